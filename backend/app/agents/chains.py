@@ -0,0 +1,165 @@
+from functools import lru_cache
+from langchain_core.exceptions import OutputParserException
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from backend.app.utils.hedging import HedgedChain
+from backend.app.utils.llm import MODEL_TIERS, get_llm, next_tier, route_tier
+from backend.app.utils.metrics import record_escalation
+from backend.app.models.schemas import ContentMetadata
+
+# Prompts and parsers are built once at import; format instructions are
+# rendered here and pre-bound into the prompt so no call pays for them.
+
+CONTENT_UNDERSTANDING_PROMPT = """
+        Analyze the following content and extract structured metadata.
+
+        Content: {content}
+        Desired Tone: {tone}
+
+        Return a JSON object with the following keys:
+        - intent: What is the goal of this post?
+        - audience: Who is the target audience?
+        - keywords: List of top 5 keywords.
+        - topic: The main topic.
+        - tone: The detected or requested tone.
+        - summary: A brief summary of the content.
+
+        {format_instructions}
+        """
+
+HASHTAG_RESEARCH_PROMPT = """
+        Based on the following search results and topic, generate a list of optimized hashtags for each platform.
+
+        Topic: {topic}
+        Keywords: {keywords}
+        Search Results: {search_results}
+        Target Platforms: {platforms}
+
+        Return a JSON object where keys are platform names (lowercase) and values are lists of hashtags (strings).
+        Example:
+        {{
+            "twitter": ["#tag1", "#tag2"],
+            "instagram": ["#tag1", "#tag2", ...]
+        }}
+
+        {format_instructions}
+        """
+
+PLATFORM_ADAPTER_PROMPT = """
+        You are an expert social media manager.
+
+        Platform: {platform}
+        Task: {instruction}
+
+        Base Content: {content}
+        Metadata: {metadata}
+
+        Generate the content for {platform}. Do NOT include hashtags yet, just the text body (unless specified as placeholders).
+        """
+
+CONTENT_OPTIMIZER_PROMPT = """
+        You are a final content polisher.
+
+        Platform: {platform}
+        Draft Content: {content}
+        Hashtags to Integrate: {tags}
+        Brand Tone: {tone}
+
+        Task:
+        1. Polish the draft for clarity and engagement.
+        2. Ensure the tone matches the brand.
+        3. Append or integrate the hashtags naturally (or at the end, depending on platform norms).
+        4. Return ONLY the final ready-to-post text.
+        """
+
+SCHEDULING_ADVISOR_PROMPT = """
+        Suggest the best posting times for the following platforms based on general best practices and the target audience.
+
+        Platforms: {platforms}
+        Audience: {audience}
+        Topic: {topic}
+
+        Return a JSON object where keys are platform names and values are strings describing the best time (e.g., "Tuesday 10 AM").
+
+        {format_instructions}
+        """
+
+FUSED_DRAFTS_PROMPT = """
+        You are an expert social media manager.
+
+        Write a separate post for each of these platforms: {platforms}
+        Platform tasks:
+        {instructions}
+
+        Base Content: {content}
+        Metadata: {metadata}
+
+        Do NOT include hashtags yet, just the text body (unless specified as placeholders).
+        Return a JSON object where keys are platform names (lowercase) and values are the post text (strings).
+
+        {format_instructions}
+        """
+
+VISUALS_SEARCH_PROMPT = """
+        You are a creative director. Based on the topic '{topic}' and keywords {keywords},
+        generate a SINGLE, descriptive Google Image search query to find high-quality, aesthetic images
+        suitable for social media posts.
+
+        Previous queries to avoid repeating: {previous_queries}
+
+        Return ONLY the search query string. No quotes, no explanations.
+        """
+
+def _template(text, parser):
+    prompt = ChatPromptTemplate.from_template(text)
+    if "format_instructions" in prompt.input_variables:
+        prompt = prompt.partial(format_instructions=parser.get_format_instructions())
+    return prompt, parser
+
+# name -> (prompt, parser); parsers are stateless and safe to share
+CHAINS = {
+    "content_understanding": _template(CONTENT_UNDERSTANDING_PROMPT, JsonOutputParser(pydantic_object=ContentMetadata)),
+    "hashtag_research": _template(HASHTAG_RESEARCH_PROMPT, JsonOutputParser()),
+    "platform_adapter": _template(PLATFORM_ADAPTER_PROMPT, StrOutputParser()),
+    "fused_drafts": _template(FUSED_DRAFTS_PROMPT, JsonOutputParser()),
+    "content_optimizer": _template(CONTENT_OPTIMIZER_PROMPT, StrOutputParser()),
+    "scheduling_advisor": _template(SCHEDULING_ADVISOR_PROMPT, JsonOutputParser()),
+    "visuals_search": _template(VISUALS_SEARCH_PROMPT, StrOutputParser()),
+}
+
+class EscalatingChain:
+    """
+    Runs a chain on a smaller model and retries on the next tier up when its
+    JSON output does not parse.
+    """
+
+    def __init__(self, chain, fallback, node):
+        self.chain = chain
+        self.fallback = fallback
+        self.node = node
+
+    async def ainvoke(self, inputs, config=None):
+        try:
+            return await self.chain.ainvoke(inputs, config)
+        except OutputParserException as e:
+            print(f"{self.node}: unparseable output ({e}); retrying on a larger model")
+            record_escalation(self.node)
+            return await self.fallback.ainvoke(inputs, config)
+
+def get_chain(name, node=None):
+    """
+    Returns the process-wide `prompt | llm | parser` pipeline for a chain on
+    its routed model tier, hedged past its node's p95 latency. `node` picks
+    the LLM client (cache opt-out is per node) and latency window, and
+    defaults to `name`.
+    """
+    return _build_chain(name, node or name, route_tier(name))
+
+@lru_cache(maxsize=None)
+def _build_chain(name, node, tier):
+    prompt, parser = CHAINS[name]
+    chain = HedgedChain(prompt | get_llm(node, model=MODEL_TIERS[tier]) | parser, node)
+    larger = next_tier(tier)
+    if larger is not None and isinstance(parser, JsonOutputParser):
+        return EscalatingChain(chain, _build_chain(name, node, larger), node)
+    return chain
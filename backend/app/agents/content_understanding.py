@@ -1,9 +1,8 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from backend.app.utils.llm import get_llm
-from backend.app.models.schemas import ContentMetadata
+from backend.app.agents.chains import get_chain
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.metrics import record_fallback
 
-def content_understanding_agent(state):
+async def content_understanding_agent(state):
     """
     Analyzes user's input to extract structured metadata.
     """
@@ -11,40 +10,17 @@ def content_understanding_agent(state):
     base_content = state["base_content"]
     tone = state["tone"]
     
-    llm = get_llm()
-    
-    parser = JsonOutputParser(pydantic_object=ContentMetadata)
-    
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Analyze the following content and extract structured metadata.
-        
-        Content: {content}
-        Desired Tone: {tone}
-        
-        Return a JSON object with the following keys:
-        - intent: What is the goal of this post?
-        - audience: Who is the target audience?
-        - keywords: List of top 5 keywords.
-        - topic: The main topic.
-        - tone: The detected or requested tone.
-        - summary: A brief summary of the content.
-        
-        {format_instructions}
-        """
-    )
-    
-    chain = prompt | llm | parser
+    chain = get_chain("content_understanding")
     
     try:
-        metadata = chain.invoke({
+        metadata = await within_deadline("content_understanding", chain.ainvoke({
             "content": base_content,
-            "tone": tone,
-            "format_instructions": parser.get_format_instructions()
-        })
+            "tone": tone
+        }))
         return {"metadata": metadata}
     except Exception as e:
         print(f"Error in Content Understanding Agent: {e}")
+        record_fallback("content_understanding")
         # Fallback metadata
         return {"metadata": {
             "intent": "general",
@@ -1,12 +1,52 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from backend.app.utils.llm import get_llm
-from backend.app.utils.tools import get_tavily_search
+import os
+from backend.app.agents.chains import get_chain
+from backend.app.utils.cache import SingleFlight, TTLCache
+from backend.app.utils.compaction import compact_search_results
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.llm import LLM_CACHE_ENABLED, LLM_CACHE_OPT_OUT
+from backend.app.utils.metrics import record_fallback, register_cache
+from backend.app.utils.tools import normalize_search_terms, search_trending_hashtags
 
-def hashtag_research_agent(state):
+# Hashtags per (topic, keywords, platforms). The hashtag node and the platform
+# pipelines waiting on it share one run; failed runs are not cached.
+_hashtag_cache = TTLCache(
+    ttl_seconds=float(os.getenv("HASHTAG_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("HASHTAG_CACHE_MAX_ENTRIES", "512"))
+)
+register_cache("hashtags", _hashtag_cache)
+# Opting hashtag_research out of the LLM cache limits sharing to runs in flight
+HASHTAG_CACHE_ENABLED = LLM_CACHE_ENABLED and "hashtag_research" not in LLM_CACHE_OPT_OUT
+_hashtag_flight = SingleFlight()
+
+async def _research_hashtags(topic, keywords, platforms):
+    # 1. Search for trends (cached per normalized topic/keywords)
+    try:
+        search_results = await search_trending_hashtags(topic, keywords)
+    except Exception as e:
+        print(f"Tavily search failed: {e}")
+        record_fallback("hashtag_research.search")
+        search_results = []
+        
+    # 2. Generate hashtags per platform
+    chain = get_chain("hashtag_research")
+    
+    hashtags = await chain.ainvoke({
+        "topic": topic,
+        "keywords": keywords,
+        # Hashtags and short snippets instead of the raw result list
+        "search_results": compact_search_results("hashtag_research", search_results),
+        "platforms": platforms
+    })
+    return {"hashtags": hashtags}
+
+async def hashtag_research_agent(state):
     """
     Fetches trending hashtags using Tavily and LLM.
     """
+    reused = state.get("reuse", {}).get("hashtag_research")
+    if reused is not None:
+        return reused
+    
     print("--- HASHTAG RESEARCH AGENT ---")
     metadata = state.get("metadata", {})
     platforms = state.get("platforms", [])
@@ -14,51 +54,13 @@ def hashtag_research_agent(state):
     topic = metadata.get("topic", "")
     keywords = metadata.get("keywords", [])
     
-    tavily = get_tavily_search()
-    llm = get_llm()
-    
-    # 1. Search for trends
-    search_query = f"trending hashtags for {topic} {' '.join(keywords)}"
-    try:
-        search_results = tavily.invoke(search_query)
-    except Exception as e:
-        print(f"Tavily search failed: {e}")
-        search_results = []
-        
-    # 2. Generate hashtags per platform
-    parser = JsonOutputParser()
-    
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Based on the following search results and topic, generate a list of optimized hashtags for each platform.
-        
-        Topic: {topic}
-        Keywords: {keywords}
-        Search Results: {search_results}
-        Target Platforms: {platforms}
-        
-        Return a JSON object where keys are platform names (lowercase) and values are lists of hashtags (strings).
-        Example:
-        {{
-            "twitter": ["#tag1", "#tag2"],
-            "instagram": ["#tag1", "#tag2", ...]
-        }}
-        
-        {format_instructions}
-        """
-    )
-    
-    chain = prompt | llm | parser
-    
+    key = (normalize_search_terms(topic, keywords), tuple(platforms))
+    load = lambda: _research_hashtags(topic, keywords, platforms)
+    shared = _hashtag_cache.get_or_load(key, load) if HASHTAG_CACHE_ENABLED else _hashtag_flight.do(key, load)
     try:
-        hashtags = chain.invoke({
-            "topic": topic,
-            "keywords": keywords,
-            "search_results": search_results,
-            "platforms": platforms,
-            "format_instructions": parser.get_format_instructions()
-        })
-        return {"hashtags": hashtags}
+        # The shared load keeps running (and is cached) if this caller's deadline passes
+        return await within_deadline("hashtag_research", shared)
     except Exception as e:
         print(f"Error in Hashtag Agent: {e}")
+        record_fallback("hashtag_research")
         return {"hashtags": {p: [] for p in platforms}}
@@ -1,53 +1,50 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from backend.app.utils.llm import get_llm
+import asyncio
+import os
+from backend.app.agents.chains import get_chain
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.metrics import record_fallback
 
-def content_optimizer_agent(state):
+# Upper bound on concurrent polish calls per request
+OPTIMIZER_MAX_CONCURRENCY = int(os.getenv("OPTIMIZER_MAX_CONCURRENCY", "5"))
+
+async def optimize_platform(platform, draft, tags, tone):
+    """
+    Polishes one platform's draft and merges its hashtags.
+    """
+    print(f"--- CONTENT OPTIMIZER: {platform} ---")
+    chain = get_chain("content_optimizer")
+    tag_text = " ".join(tags)
+    
+    try:
+        # Tagged so streaming can tell polish tokens from draft tokens
+        return await within_deadline("content_optimizer", chain.ainvoke({
+            "platform": platform,
+            "content": draft,
+            "tags": tag_text,
+            "tone": tone
+        }, config={"tags": ["polish"]}))
+    except Exception as e:
+        print(f"Error optimizing for {platform}: {e}")
+        record_fallback("content_optimizer")
+        return draft + f"\n\n{tag_text}"
+
+async def content_optimizer_agent(state):
     """
     Refines content and merges hashtags.
     """
     print("--- CONTENT OPTIMIZER AGENT ---")
     platform_outputs = state.get("platform_outputs", {})
     hashtags = state.get("hashtags", {})
-    metadata = state.get("metadata", {})
+    tone = state.get("metadata", {}).get("tone", "neutral")
+    
+    semaphore = asyncio.Semaphore(OPTIMIZER_MAX_CONCURRENCY)
     
-    llm = get_llm()
+    async def bounded(platform):
+        async with semaphore:
+            return await optimize_platform(platform, platform_outputs[platform], hashtags.get(platform, []), tone)
     
-    optimized_outputs = {}
+    # Polish all platforms concurrently
+    platforms = list(platform_outputs.keys())
+    results = await asyncio.gather(*[bounded(p) for p in platforms])
     
-    for platform, content in platform_outputs.items():
-        platform_tags = hashtags.get(platform, [])
-        tags_str = " ".join(platform_tags)
-        
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are a final content polisher.
-            
-            Platform: {platform}
-            Draft Content: {content}
-            Hashtags to Integrate: {tags}
-            Brand Tone: {tone}
-            
-            Task:
-            1. Polish the draft for clarity and engagement.
-            2. Ensure the tone matches the brand.
-            3. Append or integrate the hashtags naturally (or at the end, depending on platform norms).
-            4. Return ONLY the final ready-to-post text.
-            """
-        )
-        
-        chain = prompt | llm | StrOutputParser()
-        
-        try:
-            final_content = chain.invoke({
-                "platform": platform,
-                "content": content,
-                "tags": tags_str,
-                "tone": metadata.get("tone", "neutral")
-            })
-            optimized_outputs[platform] = final_content
-        except Exception as e:
-            print(f"Error optimizing for {platform}: {e}")
-            optimized_outputs[platform] = content + f"\n\n{tags_str}"
-            
-    return {"platform_outputs": optimized_outputs}
+    return {"platform_outputs": dict(zip(platforms, results))}
@@ -1,8 +1,21 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from backend.app.utils.llm import get_llm
+import asyncio
+from backend.app.agents.chains import get_chain
+from backend.app.agents.hashtag_research import hashtag_research_agent
+from backend.app.agents.optimizer import content_optimizer_agent, optimize_platform
+from backend.app.utils.compaction import compact_metadata
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.metrics import record_fallback
 
-def platform_adapter_agent(state, platform):
+# Per-platform task given to the shared adapter prompt
+PLATFORM_INSTRUCTIONS = {
+    "twitter": "Rewrite in <280 chars. Add a hook. Add a CTA (optional). Include 1-3 placeholders for hashtags.",
+    "instagram": "Focus on emotional storytelling. Write an engaging caption. Use line-break formatting. Add placeholders for 20 hashtags.",
+    "linkedin": "Use a professional tone. Focus on value delivery. Use bullet points. Add a CTA at the end.",
+    "youtube": "Generate a Video Title, SEO Description, and a comma-separated Tag List.",
+    "blog": "Write a 300-600 word blog post. SEO-optimized. Include subheadings and a summary paragraph."
+}
+
+async def platform_adapter_agent(state, platform):
     """
     Generates platform-specific content.
     """
@@ -10,63 +23,96 @@ def platform_adapter_agent(state, platform):
     base_content = state["base_content"]
     metadata = state.get("metadata", {})
     
-    llm = get_llm()
-    
-    instructions = {
-        "twitter": "Rewrite in <280 chars. Add a hook. Add a CTA (optional). Include 1-3 placeholders for hashtags.",
-        "instagram": "Focus on emotional storytelling. Write an engaging caption. Use line-break formatting. Add placeholders for 20 hashtags.",
-        "linkedin": "Use a professional tone. Focus on value delivery. Use bullet points. Add a CTA at the end.",
-        "youtube": "Generate a Video Title, SEO Description, and a comma-separated Tag List.",
-        "blog": "Write a 300-600 word blog post. SEO-optimized. Include subheadings and a summary paragraph."
-    }
+    instruction = PLATFORM_INSTRUCTIONS.get(platform.lower(), "Rewrite the content for this platform.")
     
-    instruction = instructions.get(platform.lower(), "Rewrite the content for this platform.")
-    
-    prompt = ChatPromptTemplate.from_template(
-        """
-        You are an expert social media manager.
-        
-        Platform: {platform}
-        Task: {instruction}
-        
-        Base Content: {content}
-        Metadata: {metadata}
-        
-        Generate the content for {platform}. Do NOT include hashtags yet, just the text body (unless specified as placeholders).
-        """
-    )
-    
-    chain = prompt | llm | StrOutputParser()
+    chain = get_chain("platform_adapter", f"{platform}_adapter")
     
     try:
-        result = chain.invoke({
+        result = await within_deadline("platform_adapter", chain.ainvoke({
             "platform": platform,
             "instruction": instruction,
             "content": base_content,
-            "metadata": metadata
-        })
+            "metadata": compact_metadata("platform_adapter", metadata)
+        }))
         
-        # Store in state
-        current_outputs = state.get("platform_outputs", {})
-        current_outputs[platform] = result
-        return {"platform_outputs": current_outputs}
+        # Only return this platform's draft; the state reducer merges it with the others
+        return {"platform_outputs": {platform: result}}
         
     except Exception as e:
         print(f"Error in {platform} Adapter: {e}")
+        record_fallback(f"{platform}_adapter")
+        return {}
+
+async def platform_pipeline_agent(state, platform):
+    """
+    Drafts one platform and polishes it as soon as its draft and the shared
+    hashtags are ready, without waiting for the other platforms.
+    """
+    drafted, researched = await asyncio.gather(
+        platform_adapter_agent(state, platform),
+        hashtag_research_agent(state)
+    )
+    draft = drafted.get("platform_outputs", {}).get(platform)
+    if draft is None:
         return {}
+    
+    tags = researched.get("hashtags", {}).get(platform, [])
+    tone = state.get("metadata", {}).get("tone", "neutral")
+    return {"platform_outputs": {platform: await optimize_platform(platform, draft, tags, tone)}}
 
 # Wrapper functions for each platform to be used as nodes
-def twitter_agent(state):
-    return platform_adapter_agent(state, "twitter")
+async def twitter_agent(state):
+    return await platform_pipeline_agent(state, "twitter")
 
-def instagram_agent(state):
-    return platform_adapter_agent(state, "instagram")
+async def instagram_agent(state):
+    return await platform_pipeline_agent(state, "instagram")
 
-def linkedin_agent(state):
-    return platform_adapter_agent(state, "linkedin")
+async def linkedin_agent(state):
+    return await platform_pipeline_agent(state, "linkedin")
 
-def youtube_agent(state):
-    return platform_adapter_agent(state, "youtube")
+async def youtube_agent(state):
+    return await platform_pipeline_agent(state, "youtube")
 
-def blog_agent(state):
-    return platform_adapter_agent(state, "blog")
+async def blog_agent(state):
+    return await platform_pipeline_agent(state, "blog")
+
+async def fused_adapter_agent(state):
+    """
+    Drafts every selected platform with a single structured call, then polishes
+    them all. Platforms whose entry is missing or empty get their own adapter call.
+    """
+    print("--- FUSED PLATFORM ADAPTER AGENT ---")
+    platforms = [p for p in state.get("platforms", []) if p in PLATFORM_INSTRUCTIONS]
+    
+    chain = get_chain("fused_drafts")
+    
+    # Hashtags are researched while the drafts are written
+    research = asyncio.ensure_future(hashtag_research_agent(state))
+    try:
+        drafts = await within_deadline("platform_adapter", chain.ainvoke({
+            "platforms": platforms,
+            "instructions": "\n".join(f"- {p}: {PLATFORM_INSTRUCTIONS[p]}" for p in platforms),
+            "content": state["base_content"],
+            "metadata": compact_metadata("fused_drafts", state.get("metadata", {}))
+        }))
+    except Exception as e:
+        print(f"Error in Fused Adapter: {e}")
+        record_fallback("fused_drafts")
+        drafts = {}
+    
+    if not isinstance(drafts, dict):
+        drafts = {}
+    outputs = {
+        p: drafts[p] for p in platforms
+        if isinstance(drafts.get(p), str) and drafts[p].strip()
+    }
+    
+    missing = [p for p in platforms if p not in outputs]
+    if missing:
+        print(f"Fused draft invalid for {missing}; falling back to per-platform calls")
+        results = await asyncio.gather(*[platform_adapter_agent(state, p) for p in missing])
+        for result in results:
+            outputs.update(result.get("platform_outputs", {}))
+    
+    researched = await research
+    return await content_optimizer_agent({**state, "platform_outputs": outputs, **researched})
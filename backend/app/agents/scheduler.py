@@ -1,8 +1,8 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from backend.app.utils.llm import get_llm
+from backend.app.agents.chains import get_chain
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.metrics import record_fallback
 
-def scheduling_advisor_agent(state):
+async def scheduling_advisor_agent(state):
     """
     Generates posting time suggestions.
     """
@@ -10,33 +10,16 @@ def scheduling_advisor_agent(state):
     platforms = state.get("platforms", [])
     metadata = state.get("metadata", {})
     
-    llm = get_llm()
-    parser = JsonOutputParser()
-    
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Suggest the best posting times for the following platforms based on general best practices and the target audience.
-        
-        Platforms: {platforms}
-        Audience: {audience}
-        Topic: {topic}
-        
-        Return a JSON object where keys are platform names and values are strings describing the best time (e.g., "Tuesday 10 AM").
-        
-        {format_instructions}
-        """
-    )
-    
-    chain = prompt | llm | parser
+    chain = get_chain("scheduling_advisor")
     
     try:
-        schedules = chain.invoke({
+        schedules = await within_deadline("scheduling_advisor", chain.ainvoke({
             "platforms": platforms,
             "audience": metadata.get("audience", "general"),
-            "topic": metadata.get("topic", "general"),
-            "format_instructions": parser.get_format_instructions()
-        })
+            "topic": metadata.get("topic", "general")
+        }))
         return {"schedules": schedules}
     except Exception as e:
         print(f"Error in Scheduling Agent: {e}")
+        record_fallback("scheduling_advisor")
         return {"schedules": {p: "Best time unknown" for p in platforms}}
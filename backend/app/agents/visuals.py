@@ -1,56 +1,102 @@
 import os
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.utilities import GoogleSerperAPIWrapper
-from langchain_core.output_parsers import StrOutputParser
 from backend.app.models.state import AgentState
+from backend.app.utils.cache import SingleFlight, TTLCache
+from backend.app.utils.images import prefetch_images
+from backend.app.agents.chains import get_chain
+from backend.app.utils.deadlines import within_deadline
+from backend.app.utils.metrics import record_fallback, register_cache
+from backend.app.utils.tools import normalize_search_terms, search_images, serper_available
 
-def visuals_agent(state: AgentState):
+# Images shown per page in the gallery
+VISUALS_PAGE_SIZE = 4
+# Images requested from Serper per search; extras are kept for later refreshes
+VISUALS_CANDIDATES = int(os.getenv("VISUALS_CANDIDATES", "20"))
+# How long the agent waits for the image proxy to download a page; slower
+# images keep downloading in the background, and 0 skips prefetching
+VISUALS_PREFETCH_TIMEOUT_SECONDS = float(os.getenv("VISUALS_PREFETCH_TIMEOUT_SECONDS", "3"))
+
+# Per (topic, keywords): the queries used so far, every candidate URL and a paging cursor
+_visuals_cache = TTLCache(
+    ttl_seconds=float(os.getenv("VISUALS_CACHE_TTL_SECONDS", "3600")),
+    max_entries=int(os.getenv("VISUALS_CACHE_MAX_ENTRIES", "512"))
+)
+register_cache("visuals", _visuals_cache)
+_search_flight = SingleFlight()
+
+async def _search_candidates(topic, keywords, entry):
+    """
+    Writes a new image query (avoiding queries already used) and appends the
+    unseen Serper results to the cached candidates.
+    """
+    chain = get_chain("visuals_search")
+    search_query = (await chain.ainvoke({
+        "topic": topic,
+        "keywords": keywords,
+        "previous_queries": entry["queries"] or "None"
+    })).strip()
+    print(f"Visuals Search Query: {search_query}")
+
+    results = await search_images(search_query, VISUALS_CANDIDATES)
+
+    seen = set(entry["images"])
+    for img in results.get("images", []):
+        url = img.get("imageUrl")
+        if url and url not in seen:
+            entry["images"].append(url)
+            seen.add(url)
+    entry["queries"].append(search_query)
+
+async def next_visuals(topic, keywords, refresh=False):
+    """
+    Returns the next page of image URLs for a topic. A fresh generation starts
+    at the first cached page; a refresh pages through cached candidates and only
+    searches again once they run out.
+    """
+    key = normalize_search_terms(topic, keywords)
+    entry = _visuals_cache.get(key)
+    if entry is None:
+        entry = {"queries": [], "images": [], "cursor": 0}
+        _visuals_cache.set(key, entry)
+    elif not refresh:
+        entry["cursor"] = 0
+
+    if entry["cursor"] >= len(entry["images"]):
+        # Concurrent refreshes for the same topic share one search
+        await _search_flight.do(key, lambda: _search_candidates(topic, keywords, entry))
+        if entry["cursor"] >= len(entry["images"]):
+            # Nothing new came back; start over from the first page
+            entry["cursor"] = 0
+
+    page = entry["images"][entry["cursor"]:entry["cursor"] + VISUALS_PAGE_SIZE]
+    entry["cursor"] += len(page)
+    return page
+
+async def visuals_agent(state: AgentState, refresh=False):
     """
     Generates a search query for visuals and fetches images using Google Serper.
     """
     print("--- VISUALS AGENT ---")
-    
+
     # 1. Check if Serper API key is set
-    if not os.getenv("SERPER_API_KEY"):
+    if not serper_available():
         print("Skipping visuals: SERPER_API_KEY not found.")
-        return {"visuals": []}
+        return {"visuals": [], "visual_ids": []}
 
     metadata = state.get("metadata", {})
     topic = metadata.get("topic", "general topic")
     keywords = metadata.get("keywords", [])
-    
-    # 2. Generate Search Query using Groq
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_template(
-        """
-        You are a creative director. Based on the topic '{topic}' and keywords {keywords},
-        generate a SINGLE, descriptive Google Image search query to find high-quality, aesthetic images 
-        suitable for social media posts.
-        
-        Return ONLY the search query string. No quotes, no explanations.
-        """
-    )
-    
-    chain = prompt | llm | StrOutputParser()
+
+    # 2. Serve a page of cached candidates, searching with Groq + Serper when needed
     try:
-        search_query = chain.invoke({"topic": topic, "keywords": keywords}).strip()
-        print(f"Visuals Search Query: {search_query}")
-        
-        # 3. Search using Serper
-        search = GoogleSerperAPIWrapper(type="images", k=4)
-        results = search.results(search_query)
-        
-        image_urls = []
-        if "images" in results:
-            image_urls = [img["imageUrl"] for img in results["images"][:4]]
-            
-        return {"visuals": image_urls}
+        image_urls = await within_deadline("visuals_search", next_visuals(topic, keywords, refresh=refresh))
         
+        # 3. Download the page into the backend image cache, dropping duplicate images
+        image_urls, image_ids = await within_deadline(
+            "visuals_search", prefetch_images(image_urls, VISUALS_PREFETCH_TIMEOUT_SECONDS)
+        )
+        return {"visuals": image_urls, "visual_ids": image_ids}
+
     except Exception as e:
         print(f"Error in Visuals Agent: {e}")
-        return {"visuals": []}
+        record_fallback("visuals_search")
+        return {"visuals": [], "visual_ids": []}
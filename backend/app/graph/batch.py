@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from backend.app.agents.content_understanding import content_understanding_agent
+from backend.app.agents.hashtag_research import hashtag_research_agent
+from backend.app.agents.scheduler import scheduling_advisor_agent
+from backend.app.agents.visuals import visuals_agent
+from backend.app.utils.deadlines import request_deadline, resolve_budget
+from backend.app.utils.tools import normalize_search_terms
+
+# Upper bound on concurrent agent calls / graph runs within one batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+async def run_batch(graph, initial_states, budgets=None):
+    """
+    Runs many generations with bounded concurrency. Items whose metadata resolves
+    to the same topic and keywords share one hashtag, visuals and scheduling run.
+    `budgets` holds each item's budget_seconds; every item's clock starts with
+    the batch. Returns the final state (or the exception) for each item, in order.
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    budgets = budgets or [None] * len(initial_states)
+    start = time.monotonic()
+
+    async def bounded(coro, budget=None):
+        async with semaphore:
+            with request_deadline(budget, start):
+                return await coro
+
+    # 1. Understand every item
+    understood = await asyncio.gather(
+        *[bounded(content_understanding_agent(state), budget) for state, budget in zip(initial_states, budgets)],
+        return_exceptions=True
+    )
+
+    # 2. Group items by normalized topic and keywords
+    groups = {}
+    for i, result in enumerate(understood):
+        if isinstance(result, Exception):
+            continue
+        metadata = result["metadata"]
+        key = normalize_search_terms(metadata.get("topic", ""), metadata.get("keywords", []))
+        groups.setdefault(key, []).append(i)
+
+    # 3. Run the shared stages once per group, for the union of the group's platforms
+    async def run_shared(indices):
+        platforms = sorted({p for i in indices for p in initial_states[i]["platforms"]})
+        # Shared results serve every item in the group, so they get the loosest budget (0 is unlimited)
+        group_budgets = [resolve_budget(budgets[i]) for i in indices]
+        budget = 0 if any(b <= 0 for b in group_budgets) else max(group_budgets)
+        state = {
+            **initial_states[indices[0]],
+            "platforms": platforms,
+            "metadata": understood[indices[0]]["metadata"]
+        }
+        hashtags, visuals, schedules = await asyncio.gather(
+            bounded(hashtag_research_agent(state), budget),
+            bounded(visuals_agent(state), budget),
+            bounded(scheduling_advisor_agent(state), budget)
+        )
+        return {
+            "hashtag_research": hashtags,
+            "visuals_search": visuals,
+            "scheduling_advisor": schedules
+        }
+
+    group_indices = list(groups.values())
+    shared = await asyncio.gather(*[run_shared(indices) for indices in group_indices])
+
+    reuse = {}
+    for indices, stages in zip(group_indices, shared):
+        for i in indices:
+            reuse[i] = {"content_understanding": understood[i], **stages}
+
+    # 4. Run the rest of the graph per item, skipping the stages computed above
+    async def run_item(i, state):
+        if isinstance(understood[i], Exception):
+            raise understood[i]
+        final_state = await bounded(graph.ainvoke({**state, "reuse": reuse[i]}), budgets[i])
+        # Shared stages ran for the group's platforms; keep only this item's
+        platforms = state["platforms"]
+        final_state["hashtags"] = {p: v for p, v in final_state.get("hashtags", {}).items() if p in platforms}
+        final_state["schedules"] = {p: v for p, v in final_state.get("schedules", {}).items() if p in platforms}
+        return final_state
+
+    return await asyncio.gather(
+        *[run_item(i, state) for i, state in enumerate(initial_states)],
+        return_exceptions=True
+    )
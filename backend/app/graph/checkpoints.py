@@ -0,0 +1,142 @@
+import asyncio
+import os
+import time
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite")
+# Threads (idempotency keys) untouched for this long are deleted
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", "86400"))
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL_SECONDS", "600"))
+
+class Checkpoints:
+    """
+    Durable graph checkpoints in SQLite, one thread per idempotency key. A run
+    on a thread is saved after every super-step, so a retried request picks
+    up where the previous attempt stopped instead of starting over.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH, ttl_seconds=CHECKPOINT_TTL_SECONDS,
+                 prune_interval=CHECKPOINT_PRUNE_INTERVAL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval = prune_interval
+        self.saver = None
+        self._conn = None
+        self._graph = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    async def open(self):
+        """
+        Opens the database on first use, so the saver (and LangGraph) is not
+        imported before the server can answer /healthz.
+        """
+        async with self._lock:
+            if self.saver is None:
+                try:
+                    await self._open()
+                except Exception:
+                    # Left closed, so the next run tries again
+                    await self.stop()
+                    raise
+
+    async def _open(self):
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        self.saver = AsyncSqliteSaver(self._conn)
+        await self.saver.setup()
+        # The saver keeps no timestamps, so last use is tracked per thread here
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        await self._conn.commit()
+        await self.prune()
+        self._task = asyncio.create_task(self._prune_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._conn is not None:
+            await self._conn.close()
+        self._task = self._conn = self.saver = self._graph = None
+
+    async def _touch(self, thread_id):
+        async with self.saver.lock:
+            await self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time())
+            )
+            await self._conn.commit()
+
+    async def prune(self):
+        """
+        Deletes the checkpoints of threads not used within the TTL.
+        """
+        cutoff = time.time() - self.ttl_seconds
+        async with self.saver.lock:
+            async with self._conn.execute(
+                "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?", (cutoff,)
+            ) as cursor:
+                expired = [row[0] for row in await cursor.fetchall()]
+        for thread_id in expired:
+            await self.saver.adelete_thread(thread_id)
+        if expired:
+            async with self.saver.lock:
+                await self._conn.executemany(
+                    "DELETE FROM checkpoint_threads WHERE thread_id = ?", [(t,) for t in expired]
+                )
+                await self._conn.commit()
+            print(f"Pruned checkpoints for {len(expired)} threads")
+
+    async def _prune_periodically(self):
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await self.prune()
+            except Exception as e:
+                print(f"Checkpoint cleanup failed: {e}")
+
+    async def astream(self, graph, thread_id, initial_state, stream_mode):
+        """
+        Streams a run of `graph` on a thread, like `graph.astream`:
+        - a new thread starts from `initial_state`
+        - a thread whose last run failed or was interrupted resumes from its
+          last completed super-step (nodes that finished are not re-run)
+        - a thread whose run finished replays its final state
+        With "updates" in `stream_mode`, the updates of nodes finished by earlier
+        attempts are replayed first, so callers see every node's output.
+        """
+        await self.open()
+        if self._graph is None:
+            self._graph = graph.copy(update={"checkpointer": self.saver})
+        config = {"configurable": {"thread_id": thread_id}}
+        await self._touch(thread_id)
+
+        snapshot = await self._graph.aget_state(config)
+        if "updates" in stream_mode:
+            async for item in self._replay_updates(config):
+                yield item
+        if snapshot.values and not snapshot.next:
+            print(f"Replaying finished run for thread {thread_id}")
+            yield "values", snapshot.values
+            return
+        if snapshot.next:
+            print(f"Resuming thread {thread_id} at {', '.join(snapshot.next)}")
+        async for item in self._graph.astream(
+            None if snapshot.next else initial_state, config, stream_mode=stream_mode
+        ):
+            yield item
+
+    async def _replay_updates(self, config):
+        # Each checkpoint holds the results of the tasks run from it; the latest
+        # one's tasks are left out, as resuming runs (or re-emits) them
+        history = [snapshot async for snapshot in self._graph.aget_state_history(config)]
+        for snapshot in reversed(history[1:]):
+            for task in snapshot.tasks:
+                if task.name != "__start__" and task.result:
+                    yield "updates", {task.name: task.result}
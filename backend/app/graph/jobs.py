@@ -0,0 +1,151 @@
+import asyncio
+import os
+import uuid
+from backend.app.utils.job_store import QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, TERMINAL_STATUSES
+
+# Jobs executed concurrently per process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Submissions are rejected once this many jobs are waiting
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+# A running job whose lease is not renewed for this long is taken over by
+# another process; leases are renewed every third of it
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+class JobQueueFull(Exception):
+    pass
+
+class JobManager:
+    """
+    Runs submitted jobs on a fixed pool of worker tasks. `execute(job_id, request,
+    report)` runs one job, calling `report(partial)` as partial results come in,
+    and returns the final result. Jobs live in the store, so anything still queued
+    when the process stops, or running without a live lease, is picked up again by
+    this or another process sharing the store.
+    """
+
+    def __init__(self, store, execute, workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED,
+                 lease_seconds=JOB_LEASE_SECONDS):
+        self.store = store
+        self.execute = execute
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self._running = {}
+        self._cancelled = set()
+        self._changed = {}
+
+    def start(self):
+        self.store.prune()
+        self.store.recover()
+        for job_id in self.store.queued():
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _notify(self, job_id):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def submit(self, request):
+        if self.store.count(QUEUED) >= self.max_queued:
+            raise JobQueueFull(f"{self.max_queued} jobs already queued")
+        self.store.prune()
+        job = self.store.create(request)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    async def wait(self, job_id, after_version=-1, timeout=0.0):
+        """
+        Long-polls a job: returns it as soon as its version is newer than
+        `after_version` or it has finished, or when `timeout` runs out.
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["version"] > after_version or job["status"] in TERMINAL_STATUSES:
+                return job
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return job
+            event = self._changed.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return self.store.get(job_id)
+
+    def cancel(self, job_id):
+        if self.store.update(job_id, only_if=(QUEUED, RUNNING), status=CANCELLED):
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancelled.add(job_id)
+                task.cancel()
+            self._notify(job_id)
+        return self.store.get(job_id)
+
+    async def _run(self, job_id):
+        job = self.store.get(job_id)
+
+        def report(partial):
+            if self.store.update(job_id, only_if=(RUNNING,), owner=self.owner, partial=partial):
+                self._notify(job_id)
+
+        try:
+            result = await self.execute(job_id, job["request"], report)
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                # Cancelled through cancel() or taken over, and the status is already set
+                self._cancelled.discard(job_id)
+                return
+            raise
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self.store.update(job_id, only_if=(RUNNING,), owner=self.owner, status=FAILED, error=str(e))
+        else:
+            self.store.update(job_id, only_if=(RUNNING,), owner=self.owner, status=SUCCEEDED, result=result)
+        finally:
+            self._running.pop(job_id, None)
+            self._notify(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            # Skip jobs cancelled (or pruned) while they were queued
+            if not self.store.claim(job_id, self.owner, self.lease_seconds):
+                continue
+            self._notify(job_id)
+            task = asyncio.create_task(self._run(job_id))
+            self._running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                # Shutting down: leave the job queued for the next start
+                self.store.update(job_id, only_if=(RUNNING,), owner=self.owner, status=QUEUED, lease_expires_at=None)
+                raise
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                for job_id, task in list(self._running.items()):
+                    if not self.store.renew(job_id, self.owner, self.lease_seconds) and not task.done():
+                        # Cancelled by another process, or reclaimed after a missed renewal
+                        self._cancelled.add(job_id)
+                        task.cancel()
+                # Jobs left behind by processes that stopped renewing their leases
+                for job_id in self.store.recover():
+                    self._queue.put_nowait(job_id)
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
@@ -0,0 +1,55 @@
+from backend.app.agents.hashtag_research import hashtag_research_agent
+from backend.app.graph.workflow import PLATFORM_NODES, FUSED_NODE
+
+def _only(values, platforms):
+    return {p: v for p, v in values.items() if p in platforms}
+
+async def plan_reuse(previous, state):
+    """
+    Builds the reuse map for regenerating a stored run with the platforms and
+    tone in `state`. A node is reused when none of its inputs changed:
+    - content_understanding: always, with the new tone written into the metadata
+    - hashtag_research: kept platforms are reused, added ones are researched here
+    - visuals_search: always (topic and keywords are unchanged)
+    - scheduling_advisor: unless platforms were added
+    - platform pipelines: kept platforms, unless the tone changed
+    """
+    nodes = previous["nodes"]
+    # Stored requests keep the client's casing; state platforms are lowercased
+    old_platforms = [p.lower() for p in previous["request"]["platforms"]]
+    platforms = state["platforms"]
+    added = [p for p in platforms if p not in old_platforms]
+    tone_changed = state["tone"] != previous["request"]["tone"]
+
+    reuse = {}
+    metadata = dict(nodes.get("content_understanding", {}).get("metadata", {}))
+    if not metadata:
+        # Nothing to build on; the whole graph runs again
+        return reuse
+    if tone_changed:
+        metadata["tone"] = state["tone"]
+    reuse["content_understanding"] = {"metadata": metadata}
+
+    if "visuals_search" in nodes:
+        reuse["visuals_search"] = nodes["visuals_search"]
+
+    if "hashtag_research" in nodes:
+        hashtags = _only(nodes["hashtag_research"].get("hashtags", {}), platforms)
+        if added:
+            researched = await hashtag_research_agent({**state, "metadata": metadata, "platforms": added})
+            hashtags.update(_only(researched.get("hashtags", {}), added))
+        reuse["hashtag_research"] = {"hashtags": hashtags}
+
+    if "scheduling_advisor" in nodes and not added:
+        reuse["scheduling_advisor"] = {"schedules": _only(nodes["scheduling_advisor"].get("schedules", {}), platforms)}
+
+    if not tone_changed:
+        for platform in platforms:
+            node = PLATFORM_NODES.get(platform)
+            if node in nodes:
+                reuse[node] = nodes[node]
+        # The fused node drafts every platform at once, so it is only reused when nothing was added
+        if FUSED_NODE in nodes and not added:
+            reuse[FUSED_NODE] = {"platform_outputs": _only(nodes[FUSED_NODE].get("platform_outputs", {}), platforms)}
+
+    return reuse
@@ -1,10 +1,15 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Literal
 
 class ContentRequest(BaseModel):
     base_content: str
     platforms: List[str]
     tone: str
+    # "fused" drafts every platform in one LLM call instead of one call per platform
+    generation_mode: Literal["per_platform", "fused"] = "per_platform"
+    # Overall time budget; stages past their share fall back to default output.
+    # None uses REQUEST_BUDGET_SECONDS, 0 disables deadlines.
+    budget_seconds: Optional[float] = None
 
 class ContentMetadata(BaseModel):
     intent: str
@@ -25,8 +30,38 @@ class GenerationResponse(BaseModel):
     hashtags: Dict[str, List[str]]
     schedules: Dict[str, str]
     visuals: List[str] = []
+    # Ids for /visuals/image/{id}, aligned with visuals
+    visual_ids: List[str] = []
     metadata: Dict[str, Any] = {}
+    # Pass to /runs/{run_id}/regenerate to iterate on this result
+    run_id: Optional[str] = None
+
+class RegenerateRequest(BaseModel):
+    # Omitted fields keep the run's previous value
+    platforms: Optional[List[str]] = None
+    tone: Optional[str] = None
 
 class VisualsRequest(BaseModel):
     topic: str
     keywords: List[str]
+
+class BatchRequest(BaseModel):
+    requests: List[ContentRequest]
+
+class BatchItemResult(BaseModel):
+    result: Optional[GenerationResponse] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+
+class JobStatus(BaseModel):
+    id: str
+    status: str
+    # Bumped on every change; pass it back as `after` to long-poll for the next one
+    version: int
+    created_at: float
+    updated_at: float
+    partial: Optional[GenerationResponse] = None
+    result: Optional[GenerationResponse] = None
+    error: Optional[str] = None
@@ -11,8 +11,13 @@ class AgentState(TypedDict):
     base_content: str
     platforms: List[str]
     tone: str
+    generation_mode: str
     metadata: Dict[str, Any]
     platform_outputs: Annotated[Dict[str, str], merge_dicts]
     hashtags: Annotated[Dict[str, List[str]], merge_dicts]
     schedules: Annotated[Dict[str, str], merge_dicts]
     visuals: Annotated[List[str], merge_lists]
+    # Image proxy ids, aligned with visuals
+    visual_ids: Annotated[List[str], merge_lists]
+    # Precomputed node updates keyed by node name; those nodes are skipped
+    reuse: Dict[str, Dict[str, Any]]
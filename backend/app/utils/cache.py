@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent LLM response cache keyed on the rendered prompt and the model
+    configuration (model name, temperature, ...), with TTL expiry and LRU eviction.
+    """
+
+    def __init__(self, path, ttl_seconds=86400, max_entries=5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _dumps(generations):
+        return json.dumps([
+            {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+            for g in generations
+        ])
+
+    @staticmethod
+    def _loads(value):
+        generations = []
+        for item in json.loads(value):
+            if "message" in item:
+                generations.append(ChatGeneration(message=messages_from_dict([item["message"]])[0]))
+            else:
+                generations.append(Generation(text=item["text"]))
+        return generations
+
+    def lookup(self, prompt, llm_string):
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return self._loads(value)
+
+    def update(self, prompt, llm_string, return_val):
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        value = self._dumps(return_val)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            # Evict least recently used entries once over the size cap
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            if count > self.max_entries:
+                overflow = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries
+        }
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key onto a single in-flight coroutine.
+    The key is released as soon as the call completes or fails.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def _release(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved even if every waiter went away
+            future.exception()
+
+    def pending(self, key):
+        return key in self._inflight
+
+    async def do(self, key, factory):
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._release(key, f))
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(future)
+
+class TTLCache:
+    """
+    In-memory cache with a freshness window and LRU eviction. Concurrent misses
+    for the same key wait on one load instead of each calling the loader.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl_seconds, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._flight = SingleFlight()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    async def get_or_load(self, key, loader):
+        value = self.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+
+        async def load():
+            value = await loader()
+            self.set(key, value)
+            return value
+
+        return await self._flight.do(key, load)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries)
+        }
@@ -0,0 +1,123 @@
+import os
+import re
+import threading
+from collections import Counter
+from backend.app.utils.metrics import record_compaction
+
+# Token budgets for the compacted parts of each prompt (search results,
+# metadata). Override per node with PROMPT_BUDGET_<NODE>, e.g.
+# PROMPT_BUDGET_HASHTAG_RESEARCH=300; 0 disables compaction for that node.
+DEFAULT_PROMPT_BUDGETS = {
+    "hashtag_research": 400,
+    "platform_adapter": 150,
+    "fused_drafts": 150,
+}
+
+# Metadata fields each prompt actually uses
+METADATA_FIELDS = {
+    "platform_adapter": ("intent", "audience", "tone", "keywords"),
+    "fused_drafts": ("intent", "audience", "tone", "keywords"),
+}
+
+HASHTAG_PATTERN = re.compile(r"#\w+")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def prompt_budget(node):
+    return int(os.getenv(f"PROMPT_BUDGET_{node.upper()}", DEFAULT_PROMPT_BUDGETS.get(node, 0)))
+
+_tokenizer = {"encoding": None, "loader": None}
+_tokenizer_lock = threading.Lock()
+
+def _load_encoding():
+    # tiktoken downloads its encoding files on first use unless they are already
+    # in TIKTOKEN_CACHE_DIR; the download has no timeout, so it runs off-thread
+    try:
+        import tiktoken
+        _tokenizer["encoding"] = tiktoken.get_encoding(os.getenv("PROMPT_TOKENIZER", "cl100k_base"))
+    except Exception as e:
+        print(f"tiktoken unavailable ({type(e).__name__}); estimating tokens from characters")
+
+def _encoding():
+    """
+    Returns the tiktoken encoding, or None (estimate from characters) until it
+    has loaded. The first call starts loading it in the background, so neither
+    imports nor requests ever wait on the network.
+    """
+    if _tokenizer["loader"] is None:
+        with _tokenizer_lock:
+            if _tokenizer["loader"] is None:
+                _tokenizer["loader"] = threading.Thread(target=_load_encoding, name="tiktoken-loader", daemon=True)
+                _tokenizer["loader"].start()
+    return _tokenizer["encoding"]
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_tokens(text, budget):
+    if count_tokens(text) <= budget:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        return text[:budget * 4].rstrip() + "…"
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]).rstrip() + "…"
+
+def compact_search_results(node, results):
+    """
+    Turns raw search results into the hashtags they mention (most frequent
+    first) plus one short snippet per result, within the node's token budget.
+    """
+    budget = prompt_budget(node)
+    raw = str(results)
+    if not budget or not isinstance(results, list):
+        return raw
+
+    contents = [str(r.get("content", "")) if isinstance(r, dict) else str(r) for r in results]
+    tags = Counter(tag.lower() for content in contents for tag in HASHTAG_PATTERN.findall(content))
+    lines = []
+    if tags:
+        lines.append("Hashtags seen: " + " ".join(tag for tag, _ in tags.most_common(30)))
+    lines.append("Snippets:")
+
+    used = count_tokens("\n".join(lines))
+    seen = set()
+    for content in contents:
+        snippet = SENTENCE_END.split(" ".join(content.split()), maxsplit=1)[0]
+        if not snippet or snippet in seen:
+            continue
+        seen.add(snippet)
+        line = "- " + truncate_tokens(snippet, 60)
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+
+    compacted = "\n".join(lines)
+    record_compaction(node, count_tokens(raw), count_tokens(compacted))
+    return compacted
+
+def compact_metadata(node, metadata):
+    """
+    Renders only the metadata fields a prompt uses, as short `field: value` lines.
+    """
+    budget = prompt_budget(node)
+    raw = str(metadata)
+    fields = METADATA_FIELDS.get(node)
+    if not budget or not fields or not isinstance(metadata, dict):
+        return raw
+
+    lines = []
+    for field in fields:
+        value = metadata.get(field)
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value)
+        lines.append(f"{field}: {value}")
+    compacted = truncate_tokens("\n".join(lines), budget)
+    record_compaction(node, count_tokens(raw), count_tokens(compacted))
+    return compacted
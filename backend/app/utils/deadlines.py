@@ -0,0 +1,69 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from backend.app.utils.metrics import record_deadline_exceeded
+
+# Budget for requests that do not set budget_seconds; 0 means no deadlines
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "0"))
+
+# When each stage must be done, as a share of the request budget measured from
+# the start of the run. Stages on the critical path (understanding -> drafts and
+# hashtags -> polish) get increasing shares; override with DEADLINE_SHARE_<STAGE>.
+DEFAULT_STAGE_SHARES = {
+    "content_understanding": 0.25,
+    "hashtag_research": 0.6,
+    "platform_adapter": 0.6,
+    "visuals_search": 0.9,
+    "scheduling_advisor": 0.9,
+    "content_optimizer": 1.0,
+}
+STAGE_SHARES = {
+    stage: float(os.getenv(f"DEADLINE_SHARE_{stage.upper()}", share))
+    for stage, share in DEFAULT_STAGE_SHARES.items()
+}
+
+# (start, budget) of the request being run, if it has a budget
+_request_deadline = ContextVar("viralflow_request_deadline", default=None)
+
+def resolve_budget(budget_seconds):
+    return REQUEST_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+
+@contextmanager
+def request_deadline(budget_seconds=None, start=None):
+    """
+    Applies a time budget to every stage run inside the block. `start`
+    (time.monotonic()) lets several blocks share one request clock.
+    """
+    budget = resolve_budget(budget_seconds)
+    start = time.monotonic() if start is None else start
+    token = _request_deadline.set((start, budget) if budget > 0 else None)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+def stage_timeout(stage):
+    """
+    Seconds left before a stage's deadline, or None without a budget.
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    start, budget = deadline
+    return start + budget * STAGE_SHARES.get(stage, 1.0) - time.monotonic()
+
+async def within_deadline(stage, awaitable):
+    """
+    Awaits a stage's work, raising TimeoutError once its deadline passes so
+    the caller falls back to its default output.
+    """
+    timeout = stage_timeout(stage)
+    if timeout is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(timeout, 0))
+    except asyncio.TimeoutError:
+        record_deadline_exceeded(stage)
+        raise TimeoutError(f"{stage} deadline exceeded") from None
@@ -0,0 +1,44 @@
+import time
+from langchain_groq import ChatGroq
+from backend.app.utils.llm import record_model_latency
+from backend.app.utils.rate_limit import get_limiter
+
+# Completion allowance used to pre-charge the tokens-per-minute bucket
+COMPLETION_TOKEN_ESTIMATE = 1024
+
+def estimate_tokens(messages):
+    # Roughly four characters per token for English text
+    return sum(len(str(m.content)) for m in messages) // 4 + COMPLETION_TOKEN_ESTIMATE
+
+class RateLimitedChatGroq(ChatGroq):
+    """
+    ChatGroq whose async calls go through the shared per-model outbound limiter,
+    so overload slows requests down instead of failing them into fallbacks.
+    """
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = get_limiter("groq", self.model_name)
+        estimate = estimate_tokens(messages)
+        generate = super()._agenerate
+        start = time.perf_counter()
+        result = await limiter.call(
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            tokens=estimate
+        )
+        # Includes time queued on the limiter: tier routing cares about what callers wait
+        record_model_latency(self.model_name, time.perf_counter() - start)
+        usage = (result.llm_output or {}).get("token_usage", {})
+        if limiter.tokens and usage.get("total_tokens"):
+            limiter.tokens.refund(estimate - usage["total_tokens"])
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = get_limiter("groq", self.model_name)
+        stream = super()._astream
+        start = time.perf_counter()
+        async for chunk in limiter.stream(
+            lambda: stream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            tokens=estimate_tokens(messages)
+        ):
+            yield chunk
+        record_model_latency(self.model_name, time.perf_counter() - start)
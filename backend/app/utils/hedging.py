@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+from collections import deque
+from backend.app.utils.metrics import record_hedge
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+# A call still running past this percentile of its node's recent latencies gets a duplicate
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Latencies kept per node, and how many are needed before hedging starts
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Never hedge sooner than this; cache hits would otherwise drag the percentile down
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1"))
+
+class LatencyWindow:
+    """
+    The most recent latencies of one kind of call.
+    """
+
+    def __init__(self, size=LLM_HEDGE_WINDOW):
+        self._samples = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, p):
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+class HedgedChain:
+    """
+    Wraps a chain so that a call still running past its node's observed p95
+    latency gets a duplicate request; whichever answers first wins and the
+    other is cancelled.
+    """
+
+    def __init__(self, chain, node):
+        self.chain = chain
+        self.node = node
+        self.latencies = LatencyWindow()
+
+    def hedge_delay(self):
+        if not LLM_HEDGE_ENABLED or len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.latencies.percentile(LLM_HEDGE_PERCENTILE), LLM_HEDGE_MIN_DELAY_SECONDS)
+
+    async def ainvoke(self, inputs, config=None):
+        start = time.perf_counter()
+        delay = self.hedge_delay()
+        tasks = [asyncio.ensure_future(self.chain.ainvoke(inputs, config))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                record_hedge(self.node)
+                # Tagged so token streaming can skip the duplicate's output
+                hedge_config = {**(config or {}), "tags": [*(config or {}).get("tags", []), "hedge"]}
+                tasks.append(asyncio.ensure_future(self.chain.ainvoke(inputs, hedge_config)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.record(time.perf_counter() - start)
+                        return task.result()
+            # Every attempt failed; surface the original call's error
+            raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                task.cancel()
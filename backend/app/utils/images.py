@@ -0,0 +1,252 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from io import BytesIO
+from backend.app.utils.cache import SingleFlight
+from backend.app.utils.metrics import register_cache
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", ".cache/images")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Larger source images are rejected
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+# Longest side of the JPEG thumbnails served to the gallery
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "512"))
+IMAGE_FETCH_CONCURRENCY = int(os.getenv("IMAGE_FETCH_CONCURRENCY", "8"))
+IMAGE_FETCH_TIMEOUT_SECONDS = float(os.getenv("IMAGE_FETCH_TIMEOUT_SECONDS", "10"))
+
+VARIANTS = ("full", "thumb")
+
+def image_id(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+def make_thumbnail(data, size):
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        out = BytesIO()
+        image.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+class ImageStore:
+    """
+    Disk cache for proxied gallery images. Every source URL gets a stable id;
+    bytes are stored once per content hash, alongside a JPEG thumbnail, and the
+    least recently used images are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=IMAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._semaphore = None
+        self._client = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                digest TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                content_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access)")
+        self._conn.commit()
+
+    def _path(self, digest, variant):
+        return os.path.join(self.directory, digest[:2], f"{digest}.{variant}")
+
+    def register(self, url):
+        """
+        Records a source URL and returns its id; nothing is downloaded yet.
+        """
+        key = image_id(url)
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO images (id, url) VALUES (?, ?)", (key, url))
+            self._conn.commit()
+        return key
+
+    def _cached(self, key):
+        """
+        Returns (url, digest, content_type); digest is None until downloaded.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT images.url, blobs.digest, blobs.content_type FROM images "
+                "LEFT JOIN blobs ON blobs.digest = images.digest WHERE images.id = ?", (key,)
+            ).fetchone()
+        return row
+
+    def _get_client(self):
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=IMAGE_FETCH_TIMEOUT_SECONDS,
+                headers={"User-Agent": "ViralFlow-ImageProxy/1.0"}
+            )
+            self._semaphore = asyncio.Semaphore(IMAGE_FETCH_CONCURRENCY)
+        return self._client
+
+    async def fetch(self, key):
+        """
+        Makes sure the image is on disk and returns (digest, content_type).
+        Concurrent fetches of the same id share one download.
+        """
+        row = self._cached(key)
+        if row is None:
+            raise KeyError(key)
+        url, digest, content_type = row
+        if digest and os.path.exists(self._path(digest, "full")):
+            self.hits += 1
+            return digest, content_type
+        return await self._flight.do(key, lambda: self._download(key, url))
+
+    async def _download(self, key, url):
+        self.misses += 1
+        client = self._get_client()
+        async with self._semaphore, client.stream("GET", url) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "").split(";")[0].strip()
+            if not content_type.startswith("image/"):
+                raise ValueError(f"Not an image: {content_type or 'unknown type'}")
+            length = response.headers.get("content-length", "")
+            if length.isdigit() and int(length) > IMAGE_MAX_BYTES:
+                raise ValueError(f"Image too large: {length} bytes")
+            # Content-Length may be missing or wrong, so the body is capped as it arrives
+            chunks, received = [], 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > IMAGE_MAX_BYTES:
+                    raise ValueError(f"Image too large: over {IMAGE_MAX_BYTES} bytes")
+                chunks.append(chunk)
+        data = b"".join(chunks)
+
+        digest = hashlib.sha256(data).hexdigest()
+        size = await asyncio.to_thread(self._write, digest, data)
+        now = time.time()
+        with self._lock:
+            # Identical bytes from another URL share one blob
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, content_type, size, last_access) VALUES (?, ?, ?, ?)",
+                (digest, content_type, size, now)
+            )
+            self._conn.execute("UPDATE images SET digest = ? WHERE id = ?", (digest, key))
+            self._conn.commit()
+        await asyncio.to_thread(self._evict)
+        return digest, content_type
+
+    def _write(self, digest, data):
+        full = self._path(digest, "full")
+        if not os.path.exists(full):
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            # Thumbnail first: a file Pillow cannot read is rejected before anything is stored
+            thumbnail = make_thumbnail(data, IMAGE_THUMBNAIL_SIZE)
+            for path, content in ((self._path(digest, "thumb"), thumbnail), (full, data)):
+                tmp = f"{path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+        return sum(os.path.getsize(self._path(digest, v)) for v in VARIANTS)
+
+    def _evict(self):
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for digest, size in self._conn.execute("SELECT digest, size FROM blobs ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(digest)
+                total -= size
+            for digest in evicted:
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self._conn.execute("UPDATE images SET digest = NULL WHERE digest = ?", (digest,))
+            self._conn.commit()
+        for digest in evicted:
+            for variant in VARIANTS:
+                try:
+                    os.remove(self._path(digest, variant))
+                except FileNotFoundError:
+                    pass
+
+    def read(self, digest, variant="full"):
+        with self._lock:
+            self._conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self._conn.commit()
+        with open(self._path(digest, variant), "rb") as f:
+            return f.read()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries
+        }
+
+@lru_cache(maxsize=None)
+def get_image_store():
+    store = ImageStore(IMAGE_CACHE_DIR)
+    register_cache("images", store)
+    return store
+
+def _consume(task):
+    # Background prefetches may fail; the proxy endpoint retries on request
+    if not task.cancelled():
+        task.exception()
+
+async def prefetch_images(urls, timeout):
+    """
+    Registers image URLs with the proxy and downloads them in parallel, waiting
+    up to `timeout` seconds (0 only registers them; they download on first
+    request). Returns (urls, ids) without images that failed to download or
+    duplicate an earlier one; slower downloads continue in the background.
+    """
+    store = get_image_store()
+    ids = [store.register(url) for url in urls]
+    if timeout <= 0 or not ids:
+        return list(urls), ids
+
+    tasks = [asyncio.ensure_future(store.fetch(key)) for key in ids]
+    for task in tasks:
+        task.add_done_callback(_consume)
+    await asyncio.wait(tasks, timeout=timeout)
+
+    kept_urls, kept_ids, digests = [], [], set()
+    for url, key, task in zip(urls, ids, tasks):
+        if task.done():
+            if task.cancelled() or task.exception() is not None:
+                print(f"Dropping image {url}: {task.exception() if not task.cancelled() else 'cancelled'}")
+                continue
+            digest, _ = task.result()
+            if digest in digests:
+                continue
+            digests.add(digest)
+        kept_urls.append(url)
+        kept_ids.append(key)
+    return kept_urls, kept_ids
@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+class SQLiteJobStore:
+    """
+    Persistent job records: the submitted request, status, partial and final
+    results. Every change bumps `version` so pollers can wait for the next one.
+    """
+
+    def __init__(self, path, retention_seconds=86400):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                partial TEXT,
+                result TEXT,
+                error TEXT,
+                version INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                owner TEXT,
+                lease_expires_at REAL
+            )
+            """
+        )
+        # Stores created before jobs had leases
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("request", "partial", "result"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def create(self, request):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, version, created_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), now, now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def update(self, job_id, only_if=None, owner=None, **fields):
+        """
+        Sets fields on a job (status, partial, result, error). With `only_if`,
+        the update applies only while the job is in one of those statuses, and
+        with `owner` only while that process holds the job.
+        Returns True if the job was updated.
+        """
+        for field in ("partial", "result"):
+            if field in fields and fields[field] is not None:
+                fields[field] = json.dumps(fields[field])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = f"UPDATE jobs SET {assignments}, version = version + 1, updated_at = ? WHERE id = ?"
+        params = [*fields.values(), time.time(), job_id]
+        if only_if:
+            query += f" AND status IN ({', '.join('?' for _ in only_if)})"
+            params.extend(only_if)
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(owner)
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def count(self, status):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()
+        return count
+
+    def claim(self, job_id, owner, lease_seconds):
+        """
+        Moves a queued job to running under `owner` with a lease that the owner
+        must renew. Returns True if this call took the job.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, owner = ?, lease_expires_at = ?, version = version + 1, updated_at = ?
+                WHERE id = ? AND status = ?
+                """,
+                (RUNNING, owner, now + lease_seconds, now, job_id, QUEUED)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def renew(self, job_id, owner, lease_seconds):
+        """
+        Extends the lease on a running job. Returns False once the job was
+        cancelled or taken over by another process.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (time.time() + lease_seconds, job_id, RUNNING, owner)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def recover(self):
+        """
+        Requeues running jobs whose lease expired (their process stopped or
+        crashed) and returns their ids. Each is taken back with a conditional
+        update on its version, so only one process requeues it.
+        """
+        now = time.time()
+        recovered = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, version FROM jobs WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (RUNNING, now)
+            ).fetchall()
+            for row in rows:
+                cursor = self._conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL, version = version + 1, updated_at = ?
+                    WHERE id = ? AND version = ? AND status = ?
+                    """,
+                    (QUEUED, now, row["id"], row["version"], RUNNING)
+                )
+                if cursor.rowcount > 0:
+                    recovered.append(row["id"])
+            self._conn.commit()
+        return recovered
+
+    def queued(self):
+        """
+        Returns every queued job id, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def prune(self):
+        """
+        Deletes finished jobs older than the retention window.
+        """
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' for _ in TERMINAL_STATUSES)}) AND updated_at < ?",
+                (*TERMINAL_STATUSES, cutoff)
+            )
+            self._conn.commit()
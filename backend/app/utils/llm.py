@@ -1,17 +1,211 @@
 import os
-from langchain_groq import ChatGroq
+from functools import lru_cache
+import time
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.globals import set_llm_cache
+from langchain_core.tracers.context import register_configure_hook
 from dotenv import load_dotenv
+from backend.app.utils.cache import SQLiteLLMCache
+from backend.app.utils.hedging import LatencyWindow
+from backend.app.utils.metrics import LLM_SECONDS, LLM_TIER_SECONDS, LLM_TOKENS, add_request_timing, register_cache
 
 load_dotenv()
 
-def get_llm():
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Models by tier, smallest first. JSON output that does not parse is retried one tier up.
+MODEL_TIERS = {
+    "small": os.getenv("LLM_MODEL_SMALL", "llama-3.1-8b-instant"),
+    "large": os.getenv("LLM_MODEL_LARGE", DEFAULT_MODEL),
+}
+DEFAULT_TIER = "large"
+
+def parse_node_tiers(spec):
+    """
+    Parses "node=tier,..." into a dict, rejecting tiers not in MODEL_TIERS.
+    """
+    tiers = {}
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        node, _, tier = (part.strip() for part in entry.partition("="))
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown tier in LLM_NODE_TIERS: {entry}")
+        tiers[node] = tier
+    return tiers
+
+# Tier per chain: short, structured jobs default to the small model. Override
+# with LLM_NODE_TIERS, e.g. "hashtag_research=small,content_understanding=large".
+NODE_TIERS = {
+    "content_understanding": "small",
+    "scheduling_advisor": "small",
+    "visuals_search": "small",
+    **parse_node_tiers(os.getenv("LLM_NODE_TIERS", "")),
+}
+
+# A chain is routed one tier up while its own tier's median latency is this many
+# times the next tier's (e.g. when the small model's endpoint is congested)
+LLM_TIER_SWITCH_RATIO = float(os.getenv("LLM_TIER_SWITCH_RATIO", "1.5"))
+LLM_TIER_MIN_SAMPLES = int(os.getenv("LLM_TIER_MIN_SAMPLES", "20"))
+
+_tier_latencies = {tier: LatencyWindow() for tier in MODEL_TIERS}
+
+# "groq" for the real API, "stub" for offline canned responses (see utils/stubs.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+
+# Persistent response cache shared by every chain. Agents listed in
+# LLM_CACHE_OPT_OUT (comma-separated node names) always call the model.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_OPT_OUT = {a.strip() for a in os.getenv("LLM_CACHE_OPT_OUT", "").split(",") if a.strip()}
+
+_llm_cache = None
+if LLM_CACHE_ENABLED:
+    _llm_cache = SQLiteLLMCache(
+        path=os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    )
+    set_llm_cache(_llm_cache)
+    register_cache("llm", _llm_cache)
+
+def get_llm_cache():
+    return _llm_cache
+
+def next_tier(tier):
+    tiers = list(MODEL_TIERS)
+    index = tiers.index(tier) + 1
+    return tiers[index] if index < len(tiers) else None
+
+def route_tier(name):
+    """
+    Picks the model tier for a chain: its configured tier, or the next one up
+    while that tier is answering markedly faster.
+    """
+    tier = NODE_TIERS.get(name, DEFAULT_TIER)
+    larger = next_tier(tier)
+    if larger is None:
+        return tier
+    own, other = _tier_latencies[tier], _tier_latencies[larger]
+    if min(len(own), len(other)) >= LLM_TIER_MIN_SAMPLES:
+        if own.percentile(50) > other.percentile(50) * LLM_TIER_SWITCH_RATIO:
+            return larger
+    return tier
+
+def record_model_latency(model, seconds):
+    """
+    Records an uncached call's latency for every tier served by `model`.
+    """
+    for tier, tier_model in MODEL_TIERS.items():
+        if tier_model == model:
+            _tier_latencies[tier].record(seconds)
+            LLM_TIER_SECONDS.labels(tier=tier).observe(seconds)
+            add_request_timing("llm_tiers", tier, seconds)
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records per-node LLM wall time and token usage for every chat model call.
+    """
+    run_inline = True
+    ignore_chain = True
+    ignore_agent = True
+    ignore_retriever = True
+    ignore_retry = True
+    ignore_custom_event = True
+
+    def __init__(self):
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node", "unknown")
+        if "polish" in (tags or []):
+            # Polish runs inside the platform nodes; keep it apart from drafting
+            node = "content_optimizer"
+        model = metadata.get("ls_model_name", "unknown")
+        self._started[run_id] = (node, model, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        entry = self._started.pop(run_id, None)
+        if entry is None:
+            return
+        node, model, start = entry
+        elapsed = time.perf_counter() - start
+        LLM_SECONDS.labels(node=node, model=model).observe(elapsed)
+        add_request_timing("llm", node, elapsed)
+
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                if usage.get("input_tokens"):
+                    LLM_TOKENS.labels(node=node, kind="prompt").inc(usage["input_tokens"])
+                if usage.get("output_tokens"):
+                    LLM_TOKENS.labels(node=node, kind="completion").inc(usage["output_tokens"])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+# Attach the metrics handler to every LangChain run in the process
+_metrics_handler = ContextVar("viralflow_metrics_handler", default=MetricsCallbackHandler())
+register_configure_hook(_metrics_handler, inheritable=True)
+
+def _pool_limits():
+    import httpx
+    
+    # Pool sizes are configurable so a single worker can keep many generations in flight
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "60")),
+    )
+
+@lru_cache(maxsize=None)
+def get_http_client():
+    import httpx
+    return httpx.Client(limits=_pool_limits())
+
+@lru_cache(maxsize=None)
+def get_async_http_client():
+    import httpx
+    return httpx.AsyncClient(limits=_pool_limits())
+
+def get_llm(agent=None, model=DEFAULT_MODEL, temperature=0.7):
+    """
+    Returns the process-wide ChatGroq client for a model/temperature pair.
+    All instances share keep-alive connection pools.
+    """
+    use_cache = LLM_CACHE_ENABLED and agent not in LLM_CACHE_OPT_OUT
+    if LLM_PROVIDER == "stub":
+        return _build_stub_llm(agent, model, use_cache)
+    return _build_llm(model, temperature, use_cache)
+
+@lru_cache(maxsize=None)
+def _build_stub_llm(agent, model, use_cache):
+    from backend.app.utils.stubs import StubChatModel
+    
+    return StubChatModel(
+        agent=agent or "",
+        model=model,
+        latency=os.getenv("STUB_LLM_LATENCY", ""),
+        cache=None if use_cache else False
+    )
+
+@lru_cache(maxsize=None)
+def _build_llm(model, temperature, use_cache):
+    # Provider SDKs are imported on first use to keep worker startup fast
+    from backend.app.utils.groq_client import RateLimitedChatGroq
+    
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         # Fallback or error handling if key is missing, though usually we expect it in env
         raise ValueError("GROQ_API_KEY not found in environment variables")
     
-    return ChatGroq(
-        model="llama-3.3-70b-versatile",
+    return RateLimitedChatGroq(
+        model=model,
         api_key=api_key,
-        temperature=0.7
+        temperature=temperature,
+        # Retries are handled by the outbound limiter
+        max_retries=0,
+        # None defers to the global response cache, False bypasses it
+        cache=None if use_cache else False,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
     )
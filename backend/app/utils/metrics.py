@@ -0,0 +1,157 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+NODE_SECONDS = Histogram(
+    "viralflow_node_seconds", "Wall time per graph node", ["node"], buckets=LATENCY_BUCKETS
+)
+LLM_SECONDS = Histogram(
+    "viralflow_llm_seconds", "Wall time per LLM call", ["node", "model"], buckets=LATENCY_BUCKETS
+)
+LLM_TIER_SECONDS = Histogram(
+    "viralflow_llm_tier_seconds", "Wall time per uncached LLM call by model tier", ["tier"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_ESCALATIONS = Counter(
+    "viralflow_llm_escalations", "Calls retried on a larger model after unparseable output", ["node"]
+)
+LLM_TOKENS = Counter(
+    "viralflow_llm_tokens", "LLM tokens by node and kind (prompt/completion)", ["node", "kind"]
+)
+OUTBOUND_SECONDS = Histogram(
+    "viralflow_outbound_seconds", "Wall time per outbound call, including retries", ["provider"],
+    buckets=LATENCY_BUCKETS
+)
+OUTBOUND_QUEUE_SECONDS = Histogram(
+    "viralflow_outbound_queue_seconds", "Time spent waiting on rate limits before an outbound call",
+    ["provider"], buckets=LATENCY_BUCKETS
+)
+COALESCED = Counter(
+    "viralflow_coalesced_requests", "Requests that joined an identical in-flight generation", ["endpoint"]
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "viralflow_prompt_tokens_saved", "Prompt tokens removed by compaction before LLM calls", ["node"]
+)
+FALLBACKS = Counter(
+    "viralflow_fallbacks", "Times a node fell back to its default output", ["node"]
+)
+HEDGED = Counter(
+    "viralflow_llm_hedged_calls", "LLM calls that got a duplicate request after passing their p95", ["node"]
+)
+DEADLINES_EXCEEDED = Counter(
+    "viralflow_deadlines_exceeded", "Stages cut off by their share of the request budget", ["stage"]
+)
+
+# Per-request timing breakdown, collected when a handler opts in
+_request_timings = ContextVar("viralflow_request_timings", default=None)
+
+def add_request_timing(section, key, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        bucket = timings.setdefault(section, {})
+        bucket[key] = round(bucket.get(key, 0.0) + seconds, 4)
+
+@contextmanager
+def request_timings():
+    """
+    Collects node and LLM timings for everything run inside the block.
+    """
+    timings = {}
+    token = _request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings["total"] = round(time.perf_counter() - start, 4)
+        _request_timings.reset(token)
+
+def traced(name, node):
+    """
+    Wraps a graph node to record its wall time.
+    """
+    @wraps(node)
+    async def run(state):
+        start = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            elapsed = time.perf_counter() - start
+            NODE_SECONDS.labels(node=name).observe(elapsed)
+            add_request_timing("nodes", name, elapsed)
+    return run
+
+def record_fallback(node):
+    FALLBACKS.labels(node=node).inc()
+    add_request_timing("fallbacks", node, 1)
+
+def record_escalation(node):
+    LLM_ESCALATIONS.labels(node=node).inc()
+    add_request_timing("escalations", node, 1)
+
+def record_hedge(node):
+    HEDGED.labels(node=node).inc()
+    add_request_timing("hedged", node, 1)
+
+def record_deadline_exceeded(stage):
+    DEADLINES_EXCEEDED.labels(stage=stage).inc()
+    add_request_timing("deadlines_exceeded", stage, 1)
+
+def record_compaction(node, before, after):
+    saved = max(0, before - after)
+    PROMPT_TOKENS_SAVED.labels(node=node).inc(saved)
+    add_request_timing("tokens_saved", node, saved)
+    print(f"{node}: compacted prompt input from {before} to {after} tokens")
+
+def observe_outbound(provider, seconds, queued=0.0):
+    OUTBOUND_SECONDS.labels(provider=provider).observe(seconds)
+    OUTBOUND_QUEUE_SECONDS.labels(provider=provider).observe(queued)
+    add_request_timing("outbound", provider, seconds)
+    if queued:
+        add_request_timing("queued", provider, queued)
+
+_caches = {}
+_limiters = []
+
+def register_cache(name, cache):
+    """
+    Exposes a cache's stats() (hits, misses, entries, ...) on /metrics.
+    """
+    _caches[name] = cache
+
+def register_limiter(limiter):
+    _limiters.append(limiter)
+
+class _StatsCollector:
+    """
+    Reads cache and rate limiter counters at scrape time.
+    """
+
+    def collect(self):
+        hits = CounterMetricFamily("viralflow_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("viralflow_cache_misses", "Cache misses", labels=["cache"])
+        entries = GaugeMetricFamily("viralflow_cache_entries", "Entries currently cached", labels=["cache"])
+        for name, cache in _caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+            entries.add_metric([name], stats.get("entries", 0))
+
+        window = GaugeMetricFamily("viralflow_outbound_window", "Current AIMD concurrency window", labels=["limiter"])
+        in_flight = GaugeMetricFamily("viralflow_outbound_in_flight", "Outbound calls in flight", labels=["limiter"])
+        throttled = CounterMetricFamily("viralflow_outbound_throttled", "429 responses", labels=["limiter"])
+        retries = CounterMetricFamily("viralflow_outbound_retries", "Retried outbound calls", labels=["limiter"])
+        for limiter in _limiters:
+            stats = limiter.stats()
+            window.add_metric([limiter.name], stats["window"])
+            in_flight.add_metric([limiter.name], stats["in_flight"])
+            throttled.add_metric([limiter.name], stats["throttled"])
+            retries.add_metric([limiter.name], stats["retries"])
+
+        return [hits, misses, entries, window, in_flight, throttled, retries]
+
+REGISTRY.register(_StatsCollector())
@@ -0,0 +1,280 @@
+import asyncio
+import email.utils
+import os
+import random
+import re
+import time
+from collections import deque
+from functools import lru_cache
+import httpx
+from backend.app.utils.metrics import observe_outbound, register_limiter
+
+# Per-provider defaults: (requests/minute, tokens/minute, max concurrency).
+# Override with <PROVIDER>_REQUESTS_PER_MINUTE, <PROVIDER>_TOKENS_PER_MINUTE
+# and <PROVIDER>_MAX_CONCURRENCY; 0 disables a limit.
+PROVIDER_DEFAULTS = {
+    "groq": (1000, 300000, 32),
+    "tavily": (100, 0, 8),
+    "serper": (300, 0, 8),
+}
+
+MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOUND_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOUND_BACKOFF_MAX_SECONDS", "20"))
+
+class TokenBucket:
+    """
+    Refills continuously at `per_minute` units per minute, up to one minute's worth.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.available >= amount:
+                self.available -= amount
+                return
+            await asyncio.sleep((amount - self.available) / self.rate)
+
+    def refund(self, amount):
+        # Negative amounts charge the bucket when an estimate was too low
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+class AIMDWindow:
+    """
+    Concurrency window that grows by one slot per window of successes and
+    halves when the provider throttles us.
+    """
+
+    def __init__(self, maximum, minimum=1, decrease=0.5):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease = decrease
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._waiters = deque()
+
+    def _free(self):
+        return max(self.minimum, int(self.limit)) - self.in_flight
+
+    def _wake(self):
+        free = self._free()
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self):
+        while self._free() <= 0:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # We were woken but won't take the slot; pass it on
+                    self._wake()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_throttle(self):
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+def _status_code(exc):
+    code = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    if code is None:
+        # Tavily's async wrapper raises a bare Exception("Error <status>: <reason>")
+        match = re.match(r"Error (\d{3})", str(exc))
+        code = int(match.group(1)) if match else None
+    return code
+
+def is_throttled(exc):
+    return _status_code(exc) == 429
+
+def is_retryable(exc):
+    code = _status_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    # Client libraries wrap transport failures in their own types (groq.APIConnectionError, aiohttp.ClientError, ...)
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "ClientConnectionError",
+                                  "ClientOSError", "ServerDisconnectedError", "ServerTimeoutError")
+
+def retry_after_seconds(exc):
+    headers = getattr(exc, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+class OutboundLimiter:
+    """
+    Shared gate for one provider/model: request and token buckets, an AIMD
+    concurrency window, and retries with jittered exponential backoff that
+    honor Retry-After.
+    """
+
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0, max_concurrency=16,
+                 max_retries=MAX_RETRIES):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.window = AIMDWindow(max_concurrency)
+        self.max_retries = max_retries
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    async def _acquire(self, tokens):
+        """
+        Waits for a slot under every limit; returns the time spent waiting.
+        """
+        start = time.perf_counter()
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens and tokens:
+            await self.tokens.acquire(tokens)
+        await self.window.acquire()
+        return time.perf_counter() - start
+
+    async def _backoff(self, exc, attempt):
+        """
+        Decides whether to retry after `exc`; sleeps before the next attempt if so.
+        """
+        if is_throttled(exc):
+            self.throttled += 1
+            self.window.on_throttle()
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return False
+        delay = retry_after_seconds(exc)
+        if delay is not None:
+            # Everyone sharing this limiter waits out the provider's Retry-After
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        else:
+            delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        self.retries += 1
+        print(f"{self.name}: retrying in {delay:.2f}s after {type(exc).__name__}: {exc}")
+        await asyncio.sleep(delay)
+        return True
+
+    async def call(self, factory, tokens=0):
+        """
+        Awaits `factory()` under the limits, retrying transient failures.
+        """
+        attempt = 0
+        queued = 0.0
+        start = time.perf_counter()
+        try:
+            while True:
+                queued += await self._acquire(tokens)
+                released = False
+                try:
+                    result = await factory()
+                except Exception as e:
+                    self.window.release()
+                    released = True
+                    if not await self._backoff(e, attempt):
+                        raise
+                    attempt += 1
+                    continue
+                finally:
+                    # Also reached on cancellation (a BaseException), which must free the slot
+                    if not released:
+                        self.window.release()
+                self.window.on_success()
+                return result
+        finally:
+            observe_outbound(self.name, time.perf_counter() - start, queued)
+
+    async def stream(self, factory, tokens=0):
+        """
+        Like call() for async generators; only retries failures before the first chunk.
+        """
+        attempt = 0
+        queued = 0.0
+        start = time.perf_counter()
+        try:
+            while True:
+                queued += await self._acquire(tokens)
+                started = False
+                released = False
+                try:
+                    async for chunk in factory():
+                        started = True
+                        yield chunk
+                except Exception as e:
+                    self.window.release()
+                    released = True
+                    if started or not await self._backoff(e, attempt):
+                        raise
+                    attempt += 1
+                    continue
+                finally:
+                    if not released:
+                        self.window.release()
+                self.window.on_success()
+                return
+        finally:
+            observe_outbound(self.name, time.perf_counter() - start, queued)
+
+    def stats(self):
+        return {
+            "window": self.window.limit,
+            "in_flight": self.window.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries
+        }
+
+def _env_number(name, default):
+    return float(os.getenv(name, default))
+
+@lru_cache(maxsize=None)
+def get_limiter(provider, model=None):
+    """
+    Returns the process-wide limiter for a provider (and model, for LLMs).
+    """
+    rpm, tpm, concurrency = PROVIDER_DEFAULTS.get(provider, (0, 0, 16))
+    prefix = provider.upper()
+    limiter = OutboundLimiter(
+        name=f"{provider}:{model}" if model else provider,
+        requests_per_minute=_env_number(f"{prefix}_REQUESTS_PER_MINUTE", rpm),
+        tokens_per_minute=_env_number(f"{prefix}_TOKENS_PER_MINUTE", tpm),
+        max_concurrency=int(_env_number(f"{prefix}_MAX_CONCURRENCY", concurrency))
+    )
+    register_limiter(limiter)
+    return limiter
@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+class SQLiteRunStore:
+    """
+    Finished generation runs: the request, the update each graph node produced
+    and the final response, so a run can be regenerated with only the nodes
+    whose inputs changed.
+    """
+
+    def __init__(self, path, retention_seconds=86400):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                parent_id TEXT,
+                request TEXT NOT NULL,
+                nodes TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at)")
+        self._conn.commit()
+
+    def save(self, request, nodes, result, parent_id=None):
+        """
+        Stores a run and returns its id. `nodes` maps node name to its update.
+        """
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE created_at < ?", (now - self.retention_seconds,))
+            self._conn.execute(
+                "INSERT INTO runs (id, parent_id, request, nodes, result, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, parent_id, json.dumps(request), json.dumps(nodes), json.dumps(result), now)
+            )
+            self._conn.commit()
+        return run_id
+
+    def get(self, run_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        for field in ("request", "nodes", "result"):
+            run[field] = json.loads(run[field])
+        return run
@@ -0,0 +1,149 @@
+"""
+Offline stand-ins for Groq, Tavily and Serper, used for benchmarks and local
+development without spending API quota. Select them with LLM_PROVIDER=stub
+and/or SEARCH_PROVIDER=stub.
+
+Latency is sampled per call from STUB_LLM_LATENCY / STUB_SEARCH_LATENCY:
+    fixed:<seconds>
+    uniform:<low>,<high>
+    lognormal:<median>,<sigma>
+Canned responses can be overridden per node with a JSON file at
+STUB_RESPONSES_PATH ({"content_understanding": {...}, "twitter_adapter": "...", ...}).
+"""
+import asyncio
+import json
+import math
+import os
+import random
+from functools import lru_cache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+PLATFORMS = ["twitter", "instagram", "linkedin", "youtube", "blog"]
+
+DEFAULT_TEXT = (
+    "Meet the fastest way to turn one idea into content for every channel. "
+    "Draft once, adapt everywhere, and ship posts that fit each platform."
+)
+
+DEFAULT_RESPONSES = {
+    "content_understanding": {
+        "intent": "announce a product launch",
+        "audience": "developers and tech enthusiasts",
+        "keywords": ["ai", "automation", "content", "launch", "productivity"],
+        "topic": "AI content automation",
+        "tone": "professional",
+        "summary": "An AI tool that turns one idea into posts for every platform."
+    },
+    "hashtag_research": {p: ["#AI", "#Automation", "#ContentMarketing"] for p in PLATFORMS},
+    "scheduling_advisor": {p: "Tuesday 10 AM" for p in PLATFORMS},
+    "visuals_search": "modern workspace with laptop and soft natural light",
+    "fused_drafts": {p: DEFAULT_TEXT for p in PLATFORMS},
+}
+
+def sample_latency(spec):
+    """
+    Returns a delay in seconds drawn from a latency spec string.
+    """
+    if not spec:
+        return 0.0
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+@lru_cache(maxsize=None)
+def _load_responses():
+    responses = dict(DEFAULT_RESPONSES)
+    path = os.getenv("STUB_RESPONSES_PATH")
+    if path:
+        with open(path) as f:
+            responses.update(json.load(f))
+    return responses
+
+def canned_response(agent):
+    response = _load_responses().get(agent, DEFAULT_TEXT)
+    return response if isinstance(response, str) else json.dumps(response)
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers with the canned response for the calling node.
+    """
+
+    agent: str = ""
+    model: str = ""
+    latency: str = ""
+
+    @property
+    def _llm_type(self):
+        return "stub"
+
+    @property
+    def _identifying_params(self):
+        return {"agent": self.agent, "model": self.model}
+
+    def _result(self):
+        content = canned_response(self.agent)
+        usage = {"input_tokens": 0, "output_tokens": len(content) // 4, "total_tokens": len(content) // 4}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        from backend.app.utils.llm import record_model_latency
+        
+        delay = sample_latency(self.latency)
+        await asyncio.sleep(delay)
+        record_model_latency(self.model, delay)
+        return self._result()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(sample_latency(self.latency))
+        for word in canned_response(self.agent).split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+class StubTavilyAPIWrapper:
+    def __init__(self, latency=""):
+        self.latency = latency
+
+    async def raw_results_async(self, query, max_results=5, **kwargs):
+        await asyncio.sleep(sample_latency(self.latency))
+        return {"results": [
+            {
+                "url": f"https://example.com/trends/{i}",
+                "content": f"Trending for {query}: #AI #Automation #Growth{i}",
+                "score": 1.0 - i / 10
+            }
+            for i in range(max_results)
+        ]}
+
+    def clean_results(self, results):
+        return [{"url": r["url"], "content": r["content"]} for r in results]
+
+class StubTavilySearch:
+    def __init__(self, max_results=5, latency=""):
+        self.max_results = max_results
+        self.api_wrapper = StubTavilyAPIWrapper(latency)
+
+class StubSerperSearch:
+    def __init__(self, k=4, latency=""):
+        self.k = k
+        self.latency = latency
+
+    async def aresults(self, query):
+        await asyncio.sleep(sample_latency(self.latency))
+        slug = "-".join(query.lower().split())[:40]
+        return {"images": [
+            {"title": f"{query} {i}", "imageUrl": f"https://picsum.photos/seed/{slug}-{i}/800/600"}
+            for i in range(self.k)
+        ]}
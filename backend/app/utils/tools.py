@@ -1,12 +1,85 @@
 import os
-from langchain_community.tools.tavily_search import TavilySearchResults
+from functools import lru_cache
 from dotenv import load_dotenv
+from backend.app.utils.cache import TTLCache
+from backend.app.utils.metrics import register_cache
+from backend.app.utils.rate_limit import get_limiter
 
 load_dotenv()
 
-def get_tavily_search():
+# "live" for Tavily/Serper, "stub" for offline canned results (see utils/stubs.py)
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "live").lower()
+
+# Trending data for a topic barely changes within the freshness window
+_trend_cache = TTLCache(
+    ttl_seconds=float(os.getenv("TREND_CACHE_TTL_SECONDS", "3600")),
+    max_entries=int(os.getenv("TREND_CACHE_MAX_ENTRIES", "1024"))
+)
+register_cache("trends", _trend_cache)
+
+def get_tavily_search(max_results=5):
+    return _build_tavily_search(max_results)
+
+@lru_cache(maxsize=None)
+def _build_tavily_search(max_results):
+    if SEARCH_PROVIDER == "stub":
+        from backend.app.utils.stubs import StubTavilySearch
+        return StubTavilySearch(max_results=max_results, latency=os.getenv("STUB_SEARCH_LATENCY", ""))
+    
     api_key = os.getenv("TAVILY_API_KEY")
     if not api_key:
         raise ValueError("TAVILY_API_KEY not found in environment variables")
     
-    return TavilySearchResults(api_key=api_key, max_results=5)
+    # langchain_community is slow to import; load it on first search
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return TavilySearchResults(api_key=api_key, max_results=max_results)
+
+def get_serper_search(type="images", k=4):
+    return _build_serper_search(type, k)
+
+@lru_cache(maxsize=None)
+def _build_serper_search(type, k):
+    if SEARCH_PROVIDER == "stub":
+        from backend.app.utils.stubs import StubSerperSearch
+        return StubSerperSearch(k=k, latency=os.getenv("STUB_SEARCH_LATENCY", ""))
+    
+    api_key = os.getenv("SERPER_API_KEY")
+    if not api_key:
+        raise ValueError("SERPER_API_KEY not found in environment variables")
+    
+    from langchain_community.utilities import GoogleSerperAPIWrapper
+    return GoogleSerperAPIWrapper(type=type, k=k, serper_api_key=api_key)
+
+def serper_available():
+    return SEARCH_PROVIDER == "stub" or bool(os.getenv("SERPER_API_KEY"))
+
+def get_trend_cache():
+    return _trend_cache
+
+def normalize_search_terms(topic, keywords):
+    """
+    Case-folds the topic and keywords and makes keyword order irrelevant,
+    so equivalent searches share a cache entry.
+    """
+    topic = " ".join(str(topic).casefold().split())
+    keywords = sorted({" ".join(str(k).casefold().split()) for k in keywords} - {""})
+    return topic, tuple(keywords)
+
+async def search_trending_hashtags(topic, keywords):
+    topic, keywords = normalize_search_terms(topic, keywords)
+    search_query = f"trending hashtags for {topic} {' '.join(keywords)}"
+
+    async def search():
+        # Call the API wrapper directly: the tool turns errors into a string result,
+        # which would neither be retried nor kept out of the cache
+        tavily = get_tavily_search()
+        raw_results = await get_limiter("tavily").call(
+            lambda: tavily.api_wrapper.raw_results_async(search_query, tavily.max_results)
+        )
+        return tavily.api_wrapper.clean_results(raw_results["results"])
+
+    return await _trend_cache.get_or_load((topic, keywords), search)
+
+async def search_images(query, k):
+    search = get_serper_search(type="images", k=k)
+    return await get_limiter("serper").call(lambda: search.aresults(query))
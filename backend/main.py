@@ -1,46 +1,388 @@
-from fastapi import FastAPI, HTTPException
-from backend.app.models.schemas import ContentRequest, GenerationResponse, VisualsRequest
-from backend.app.graph.workflow import create_graph
-from backend.app.agents.visuals import visuals_agent
-import uvicorn
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from backend.app.models.schemas import (
+    ContentRequest, GenerationResponse, VisualsRequest, BatchRequest, BatchItemResult, BatchResponse,
+    JobStatus, RegenerateRequest
+)
+from backend.app.utils.deadlines import request_deadline
+from backend.app.utils.metrics import COALESCED, request_timings
 
-app = FastAPI(title="AI Social Media Content Manager")
+# LangGraph, LangChain and the provider SDKs are imported when the graph is first
+# built rather than at module import, so new workers come up quickly.
+# GRAPH_WARMUP: "background" (default) builds it right after startup without
+# delaying /healthz, "blocking" builds it before serving, "off" on first request.
+GRAPH_WARMUP = os.getenv("GRAPH_WARMUP", "background").lower()
 
-# Initialize Graph
-graph = create_graph()
+# Background jobs (/jobs) are persisted here so queued work survives restarts
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite")
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+# Browser cache lifetime for proxied gallery images
+IMAGE_MAX_AGE_SECONDS = int(os.getenv("IMAGE_MAX_AGE_SECONDS", "86400"))
+# Finished runs are kept here so /runs/{id}/regenerate can reuse their node outputs
+RUN_STORE_PATH = os.getenv("RUN_STORE_PATH", ".cache/runs.sqlite")
+RUN_RETENTION_SECONDS = float(os.getenv("RUN_RETENTION_SECONDS", "86400"))
+# Upper bound on a single long-poll
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "60"))
+
+_graph = None
+_graph_lock = threading.Lock()
+_jobs = None
+_checkpoints = None
+
+def get_graph():
+    """
+    Returns the compiled graph, building it once per process.
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                from backend.app.graph.workflow import create_graph
+                _graph = create_graph()
+    return _graph
+
+@lru_cache(maxsize=None)
+def get_generate_flight():
+    # utils.cache pulls in LangChain, so it is imported on first use
+    from backend.app.utils.cache import SingleFlight
+    return SingleFlight()
+
+@lru_cache(maxsize=None)
+def get_run_store():
+    from backend.app.utils.run_store import SQLiteRunStore
+    return SQLiteRunStore(RUN_STORE_PATH, RUN_RETENTION_SECONDS)
+
+def get_jobs():
+    if _jobs is None:
+        raise HTTPException(status_code=503, detail="Job workers are not running")
+    return _jobs
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _jobs, _checkpoints
+    from backend.app.graph.checkpoints import Checkpoints
+    from backend.app.graph.jobs import JobManager
+    from backend.app.utils.job_store import SQLiteJobStore
+    
+    if GRAPH_WARMUP == "blocking":
+        get_graph()
+    elif GRAPH_WARMUP == "background":
+        asyncio.get_running_loop().run_in_executor(None, get_graph)
+    
+    # Opened on the first checkpointed run
+    _checkpoints = Checkpoints()
+    _jobs = JobManager(SQLiteJobStore(JOB_STORE_PATH, JOB_RETENTION_SECONDS), run_job)
+    _jobs.start()
+    yield
+    await _jobs.stop()
+    _jobs = None
+    await _checkpoints.stop()
+    _checkpoints = None
+
+app = FastAPI(title="AI Social Media Content Manager", lifespan=lifespan)
+
+def build_initial_state(request: ContentRequest):
+    return {
+        "base_content": request.base_content,
+        "platforms": [p.lower() for p in request.platforms],
+        "tone": request.tone,
+        "generation_mode": request.generation_mode,
+        "metadata": {},
+        "platform_outputs": {},
+        "hashtags": {},
+        "schedules": {},
+        "visuals": [],
+        "visual_ids": []
+    }
+
+def generation_key(request: ContentRequest):
+    """
+    Identifies requests that would produce the same generation.
+    """
+    return (
+        request.base_content.strip(),
+        tuple(sorted({p.lower() for p in request.platforms})),
+        request.tone.strip(),
+        request.generation_mode,
+        request.budget_seconds
+    )
+
+def thread_id(idempotency_key, request: ContentRequest):
+    """
+    Checkpoint thread for a client idempotency key; a key reused with a
+    different request gets a different thread.
+    """
+    digest = hashlib.sha256(json.dumps(generation_key(request)).encode("utf-8")).hexdigest()[:16]
+    return f"{idempotency_key}:{digest}"
+
+def build_response(final_state):
+    return GenerationResponse(
+        platform_outputs=final_state.get("platform_outputs", {}),
+        hashtags=final_state.get("hashtags", {}),
+        schedules=final_state.get("schedules", {}),
+        visuals=final_state.get("visuals", []),
+        visual_ids=final_state.get("visual_ids", []),
+        metadata=final_state.get("metadata", {})
+    )
+
+def apply_update(response, update):
+    """
+    Folds a node update into a GenerationResponse-shaped dict of partial results.
+    """
+    for key in ("platform_outputs", "hashtags", "schedules"):
+        response[key].update(update.get(key, {}))
+    response["visuals"].extend(update.get("visuals", []))
+    response["visual_ids"].extend(update.get("visual_ids", []))
+    if "metadata" in update:
+        response["metadata"] = update["metadata"]
+
+def stream_graph(initial_state, stream_mode, thread=None):
+    """
+    Streams a graph run; with a thread the run is checkpointed and resumable.
+    """
+    if thread is not None and _checkpoints is not None:
+        return _checkpoints.astream(get_graph(), thread, initial_state, stream_mode)
+    return get_graph().astream(initial_state, stream_mode=stream_mode)
+
+async def run_graph(initial_state, on_update=None, thread=None):
+    """
+    Runs the graph and returns the final state and each node's update,
+    calling `on_update(update)` as nodes finish.
+    """
+    final_state = initial_state
+    nodes = {}
+    async for mode, chunk in stream_graph(initial_state, ["updates", "values"], thread):
+        if mode == "values":
+            final_state = chunk
+        else:
+            for node, update in chunk.items():
+                if update:
+                    nodes[node] = update
+                    if on_update:
+                        on_update(update)
+    return final_state, nodes
+
+def save_run(request: ContentRequest, nodes, final_state, parent_id=None):
+    """
+    Stores a finished run for later regeneration and returns its id.
+    """
+    result = build_response(final_state).model_dump(exclude={"run_id"})
+    return get_run_store().save(request.model_dump(), nodes, result, parent_id)
+
+async def run_job(job_id, payload, report):
+    """
+    Runs one background job, reporting partial results as each node finishes.
+    Jobs are checkpointed, so one interrupted by a restart resumes where it stopped.
+    """
+    request = ContentRequest(**payload)
+    initial_state = build_initial_state(request)
+    partial = build_response(initial_state).model_dump()
+    
+    def on_update(update):
+        apply_update(partial, update)
+        report(partial)
+    
+    with request_deadline(request.budget_seconds):
+        final_state, nodes = await run_graph(initial_state, on_update, thread=f"job:{job_id}")
+    response = build_response(final_state)
+    response.run_id = save_run(request, nodes, final_state)
+    return response.model_dump()
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/healthz")
+async def healthz():
+    # Must stay cheap: no graph build or provider imports
+    return {"status": "ok", "graph_ready": _graph is not None}
 
 @app.post("/generate", response_model=GenerationResponse)
-async def generate_content(request: ContentRequest):
+async def generate_content(request: ContentRequest, timings: bool = False,
+                           idempotency_key: Optional[str] = Header(None)):
+    """
+    Runs the graph for one request. With an Idempotency-Key header the run is
+    checkpointed: a retry with the same key and request resumes a failed or
+    interrupted run, or returns the finished one.
+    """
     try:
         # Initial state
-        initial_state = {
-            "base_content": request.base_content,
-            "platforms": [p.lower() for p in request.platforms],
-            "tone": request.tone,
-            "metadata": {},
-            "platform_outputs": {},
-            "hashtags": {},
-            "schedules": {},
-            "visuals": []
-        }
+        initial_state = build_initial_state(request)
+        
+        async def run():
+            with request_timings() as breakdown, request_deadline(request.budget_seconds):
+                final_state, nodes = await run_graph(initial_state, thread=thread)
+            return final_state, breakdown, save_run(request, nodes, final_state)
         
-        # Run the graph
-        # invoke returns the final state
-        final_state = graph.invoke(initial_state)
+        thread = thread_id(idempotency_key, request) if idempotency_key else None
+        # Identical requests already in flight share one graph run; keyed requests
+        # only share with the same key, so each key's checkpoint thread gets written
+        flight = get_generate_flight()
+        key = (generation_key(request), thread)
+        if flight.pending(key):
+            COALESCED.labels(endpoint="generate").inc()
+        final_state, breakdown, run_id = await flight.do(key, run)
         
-        return GenerationResponse(
-            platform_outputs=final_state.get("platform_outputs", {}),
-            hashtags=final_state.get("hashtags", {}),
-            schedules=final_state.get("schedules", {}),
-            visuals=final_state.get("visuals", []),
-            metadata=final_state.get("metadata", {})
-        )
+        response = build_response(final_state)
+        response.run_id = run_id
+        if timings:
+            # Per-node, per-LLM-call and outbound timings for this request
+            response.metadata["timings"] = breakdown
+        return response
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/generate/stream")
+async def generate_content_stream(request: ContentRequest, tokens: bool = False,
+                                  idempotency_key: Optional[str] = Header(None)):
+    """
+    Streams server-sent events as the graph runs (checkpointed and resumable
+    with an Idempotency-Key header, as for /generate):
+    - node: a node finished, with the state update it produced
+    - token: a text delta from a platform adapter, with its stage ("draft" or
+      "polish"); only with ?tokens=true
+    - done: the full GenerationResponse, with its run_id
+    - error: the run failed
+    """
+    initial_state = build_initial_state(request)
+    stream_mode = ["updates", "values", "messages"] if tokens else ["updates", "values"]
+    thread = thread_id(idempotency_key, request) if idempotency_key else None
+
+    async def event_stream():
+        final_state = initial_state
+        nodes = {}
+        try:
+            with request_deadline(request.budget_seconds):
+                async for mode, chunk in stream_graph(initial_state, stream_mode, thread):
+                    if mode == "values":
+                        final_state = chunk
+                    elif mode == "updates":
+                        for node, update in chunk.items():
+                            if update:
+                                nodes[node] = update
+                                yield format_sse("node", {"node": node, "update": update})
+                    elif mode == "messages":
+                        message, meta = chunk
+                        node = meta.get("langgraph_node", "")
+                        # Skip hedged duplicates so each call's text is streamed once
+                        if node.endswith("_adapter") and message.content and "hedge" not in meta.get("tags", []):
+                            stage = "polish" if "polish" in meta.get("tags", []) else "draft"
+                            yield format_sse("token", {"node": node, "stage": stage, "delta": message.content})
+            response = build_response(final_state)
+            response.run_id = save_run(request, nodes, final_state)
+            yield format_sse("done", response.model_dump())
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/generate/batch", response_model=BatchResponse)
+async def generate_batch(request: BatchRequest):
+    """
+    Generates a campaign of posts with bounded concurrency. Results are returned
+    in request order, with an error entry for any item that failed.
+    """
+    from backend.app.graph.batch import run_batch
+    
+    initial_states = [build_initial_state(r) for r in request.requests]
+    budgets = [r.budget_seconds for r in request.requests]
+    final_states = await run_batch(get_graph(), initial_states, budgets)
+    
+    results = []
+    for final_state in final_states:
+        if isinstance(final_state, Exception):
+            results.append(BatchItemResult(error=str(final_state)))
+        else:
+            results.append(BatchItemResult(result=build_response(final_state)))
+    return BatchResponse(results=results)
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: ContentRequest):
+    """
+    Queues a generation and returns its job id right away.
+    """
+    from backend.app.graph.jobs import JobQueueFull
+    
+    try:
+        job = get_jobs().submit(request.model_dump())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return JobStatus(**job)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, wait: float = 0, after: int = -1):
+    """
+    Returns a job's status and partial or final results. With `wait`, holds the
+    request (up to JOB_MAX_WAIT_SECONDS) until the job changes past version `after`.
+    """
+    jobs = get_jobs()
+    if wait > 0:
+        job = await jobs.wait(job_id, after, min(wait, JOB_MAX_WAIT_SECONDS))
+    else:
+        job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**job)
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    job = get_jobs().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**job)
+
+@app.get("/runs/{run_id}", response_model=GenerationResponse)
+async def get_run(run_id: str):
+    run = get_run_store().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return GenerationResponse(**run["result"], run_id=run_id)
+
+@app.post("/runs/{run_id}/regenerate", response_model=GenerationResponse)
+async def regenerate_run(run_id: str, request: RegenerateRequest, timings: bool = False):
+    """
+    Re-runs a stored run with new platforms and/or tone, executing only the
+    nodes whose inputs changed. The result is stored as a new run.
+    """
+    from backend.app.graph.regenerate import plan_reuse
+    
+    previous = get_run_store().get(run_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    content_request = ContentRequest(**{**previous["request"], **request.model_dump(exclude_none=True)})
+    initial_state = build_initial_state(content_request)
+    
+    try:
+        with request_timings() as breakdown, request_deadline(content_request.budget_seconds):
+            reuse = await plan_reuse(previous, initial_state)
+            print(f"Regenerating run {run_id}, reusing: {', '.join(reuse) or 'nothing'}")
+            final_state, nodes = await run_graph({**initial_state, "reuse": reuse})
+        
+        response = build_response(final_state)
+        response.run_id = save_run(content_request, nodes, final_state, parent_id=run_id)
+        if timings:
+            response.metadata["timings"] = breakdown
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/regenerate_visuals")
 async def regenerate_visuals(request: VisualsRequest):
+    from backend.app.agents.visuals import visuals_agent
+    
     try:
         # Construct a minimal state for the agent
         state = {
@@ -49,11 +391,45 @@ async def regenerate_visuals(request: VisualsRequest):
                 "keywords": request.keywords
             }
         }
-        # Call the agent function directly
-        result = visuals_agent(state)
-        return {"visuals": result.get("visuals", [])}
+        # Page through cached candidates before searching again
+        result = await visuals_agent(state, refresh=True)
+        return {"visuals": result.get("visuals", []), "visual_ids": result.get("visual_ids", [])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/visuals/image/{image_id}")
+async def visuals_image(image_id: str, request: Request, size: Literal["full", "thumb"] = "full"):
+    """
+    Serves a gallery image from the backend cache, downloading it on first use.
+    """
+    from backend.app.utils.images import get_image_store
+    
+    store = get_image_store()
+    try:
+        digest, content_type = await store.fetch(image_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown image")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch image: {e}")
+    
+    # Cached bytes never change for a content hash
+    etag = f'"{digest}-{size}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={IMAGE_MAX_AGE_SECONDS}, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        data = await asyncio.to_thread(store.read, digest, size)
+    except FileNotFoundError:
+        # Evicted between the lookup and the read
+        raise HTTPException(status_code=503, detail="Image was evicted, retry")
+    media_type = "image/jpeg" if size == "thumb" else content_type
+    return Response(content=data, media_type=media_type, headers=headers)
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,236 @@
+"""
+End-to-end benchmark for the generation graph and the FastAPI app, using the
+offline stub providers so no API quota is spent.
+
+    python -m benchmarks.bench_graph --concurrency 1 8 32 --requests 64
+    python -m benchmarks.bench_graph --baseline benchmarks/results/previous.json
+
+Reports p50/p95/p99 latency, requests/sec and per-node time for each
+concurrency level, and saves everything as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+def configure_environment(args):
+    # Must run before any backend module is imported
+    os.environ.setdefault("LLM_PROVIDER", "stub")
+    os.environ.setdefault("SEARCH_PROVIDER", "stub")
+    os.environ.setdefault("STUB_LLM_LATENCY", args.llm_latency)
+    os.environ.setdefault("STUB_SEARCH_LATENCY", args.search_latency)
+    # Stub image URLs are not downloaded by the image proxy
+    os.environ.setdefault("VISUALS_PREFETCH_TIMEOUT_SECONDS", "0")
+    if not args.cache:
+        os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies, wall_time, node_times, errors):
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_time_s": round(wall_time, 4),
+        "requests_per_s": round(len(latencies) / wall_time, 3) if wall_time else 0.0,
+        "latency_s": {
+            "mean": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+        },
+        "node_time_s": {
+            node: {
+                "calls": len(times),
+                "mean": round(statistics.fmean(times), 4),
+                "p95": round(percentile(times, 95), 4),
+            }
+            for node, times in sorted(node_times.items())
+        },
+    }
+
+def make_node_timer():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class NodeTimer(BaseCallbackHandler):
+        """
+        Records how long each graph node runs, from LangChain chain callbacks.
+        """
+        run_inline = True
+
+        def __init__(self):
+            self.started = {}
+            self.times = {}
+
+        def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node")
+            if node and kwargs.get("name") == node:
+                self.started[run_id] = (node, time.perf_counter())
+
+        def _finish(self, run_id):
+            entry = self.started.pop(run_id, None)
+            if entry:
+                node, start = entry
+                self.times.setdefault(node, []).append(time.perf_counter() - start)
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._finish(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id)
+
+    return NodeTimer()
+
+def sample_request(i, platforms):
+    return {
+        "base_content": f"Launching ViralFlow {i}: turn one idea into posts for every platform.",
+        "platforms": platforms,
+        "tone": "Professional",
+    }
+
+async def run_level(call, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                errors += 1
+                print(f"request {i} failed: {e}", file=sys.stderr)
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(total)])
+    return latencies, time.perf_counter() - start, errors
+
+async def bench_graph(levels, total, platforms):
+    from backend.app.graph.workflow import create_graph
+    from backend.main import build_initial_state
+    from backend.app.models.schemas import ContentRequest
+
+    graph = create_graph()
+    results = {}
+    for concurrency in levels:
+        timer = make_node_timer()
+
+        async def call(i):
+            state = build_initial_state(ContentRequest(**sample_request(i, platforms)))
+            await graph.ainvoke(state, config={"callbacks": [timer]})
+
+        latencies, wall_time, errors = await run_level(call, concurrency, total)
+        results[str(concurrency)] = summarize(latencies, wall_time, timer.times, errors)
+        print_level("graph", concurrency, results[str(concurrency)])
+    return results
+
+async def bench_api(levels, total, platforms):
+    import httpx
+    from backend.main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for concurrency in levels:
+            async def call(i):
+                response = await client.post("/generate", json=sample_request(i, platforms))
+                response.raise_for_status()
+
+            latencies, wall_time, errors = await run_level(call, concurrency, total)
+            results[str(concurrency)] = summarize(latencies, wall_time, {}, errors)
+            print_level("api", concurrency, results[str(concurrency)])
+    return results
+
+def print_level(target, concurrency, summary):
+    latency = summary["latency_s"]
+    print(
+        f"[{target}] concurrency={concurrency:<4} rps={summary['requests_per_s']:<8} "
+        f"p50={latency['p50']:.3f}s p95={latency['p95']:.3f}s p99={latency['p99']:.3f}s "
+        f"errors={summary['errors']}"
+    )
+
+def compare(report, baseline, threshold):
+    """
+    Prints p95 changes against a baseline report; returns True if any level regressed.
+    """
+    regressed = False
+    for target, levels in report["results"].items():
+        for concurrency, summary in levels.items():
+            before = baseline.get("results", {}).get(target, {}).get(concurrency)
+            if not before or not before["latency_s"]["p95"]:
+                continue
+            old, new = before["latency_s"]["p95"], summary["latency_s"]["p95"]
+            change = (new - old) / old
+            flag = "REGRESSION" if change > threshold else "ok"
+            regressed = regressed or change > threshold
+            print(f"[{target}] concurrency={concurrency:<4} p95 {old:.3f}s -> {new:.3f}s ({change:+.1%}) {flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--platforms", nargs="+", default=["twitter", "instagram", "linkedin", "youtube", "blog"])
+    parser.add_argument("--target", choices=["graph", "api", "all"], default="all")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4")
+    parser.add_argument("--search-latency", default="lognormal:0.5,0.3")
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response cache enabled")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/graph-<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous JSON report to compare p95 latency against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p95 slowdown before failing")
+    args = parser.parse_args()
+
+    configure_environment(args)
+
+    async def run():
+        results = {}
+        if args.target in ("graph", "all"):
+            results["graph"] = await bench_graph(args.concurrency, args.requests, args.platforms)
+        if args.target in ("api", "all"):
+            results["api"] = await bench_api(args.concurrency, args.requests, args.platforms)
+        return results
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "platforms": args.platforms,
+            "llm_latency": os.environ["STUB_LLM_LATENCY"],
+            "search_latency": os.environ["STUB_SEARCH_LATENCY"],
+            "llm_provider": os.environ["LLM_PROVIDER"],
+            "search_provider": os.environ["SEARCH_PROVIDER"],
+        },
+        "results": asyncio.run(run()),
+    }
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"graph-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Startup benchmark: how long it takes to import backend.main and how long a
+fresh uvicorn worker takes to answer /healthz and its first /generate.
+Uses the offline stub providers so no API quota is spent.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --baseline benchmarks/results/<previous>.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import backend.main; "
+    "print(time.perf_counter() - start)"
+)
+
+def stub_environment(warmup):
+    env = dict(os.environ)
+    env.update({
+        "LLM_PROVIDER": "stub",
+        "SEARCH_PROVIDER": "stub",
+        "STUB_LLM_LATENCY": "fixed:0",
+        "STUB_SEARCH_LATENCY": "fixed:0",
+        "VISUALS_PREFETCH_TIMEOUT_SECONDS": "0",
+        "LLM_CACHE_ENABLED": "false",
+        "GRAPH_WARMUP": warmup,
+        "PYTHONWARNINGS": "ignore",
+    })
+    return env
+
+def measure_import(env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def request(url, payload=None, timeout=60):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+def measure_first_response(env, timeout=60):
+    """
+    Starts a uvicorn worker and returns seconds from spawn to the first
+    /healthz and the first /generate response.
+    """
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("server did not become healthy")
+            try:
+                request(f"{base}/healthz", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.01)
+        healthz = time.perf_counter() - start
+
+        request(f"{base}/generate", {
+            "base_content": "Startup benchmark post",
+            "platforms": ["twitter", "linkedin"],
+            "tone": "Professional",
+        }, timeout=timeout)
+        generate = time.perf_counter() - start
+        return healthz, generate
+    finally:
+        server.terminate()
+        server.wait()
+
+def summarize(values):
+    return {
+        "median": round(statistics.median(values), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", choices=["background", "blocking", "off"], default="background")
+    parser.add_argument("--output", help="JSON report path (default: benchmarks/results/startup-<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous JSON report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before failing")
+    args = parser.parse_args()
+
+    env = stub_environment(args.warmup)
+    imports, healthz, generate = [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import(env))
+        first_healthz, first_generate = measure_first_response(env)
+        healthz.append(first_healthz)
+        generate.append(first_generate)
+
+    results = {
+        "import_backend_main_s": summarize(imports),
+        "first_healthz_s": summarize(healthz),
+        "first_generate_s": summarize(generate),
+    }
+    for name, summary in results.items():
+        print(f"{name:<24} median={summary['median']:.3f}s min={summary['min']:.3f}s max={summary['max']:.3f}s")
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {"runs": args.runs, "warmup": args.warmup},
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressed = False
+        for name, summary in results.items():
+            before = baseline.get(name, {}).get("median")
+            if not before:
+                continue
+            change = (summary["median"] - before) / before
+            flag = "REGRESSION" if change > args.threshold else "ok"
+            regressed = regressed or change > args.threshold
+            print(f"{name:<24} {before:.3f}s -> {summary['median']:.3f}s ({change:+.1%}) {flag}")
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
 import streamlit as st
 import requests
 import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 # Backend URL
-API_URL = "http://localhost:8000/generate"
+BACKEND_URL = "http://localhost:8000"
+API_URL = f"{BACKEND_URL}/generate"
+STREAM_URL = f"{BACKEND_URL}/generate/stream"
+IMAGE_URL = f"{BACKEND_URL}/visuals/image"
+# (connect, read) seconds; for the stream, read is the longest gap between events
+REQUEST_TIMEOUT = (5, 120)
+# Seconds a generation / downloaded image is reused for an identical request
+GENERATION_CACHE_TTL = 600
+IMAGE_CACHE_TTL = 3600
+IMAGE_PREFETCH_WORKERS = 8
+# Bounds on the shared response cache; least recently used entries go first
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 st.set_page_config(page_title="ViralFlow AI", layout="wide", page_icon="🚀")
 
@@ -35,6 +52,128 @@ st.markdown("""
 if "results" not in st.session_state:
     st.session_state.results = None
 
+# Platform Icons
+PLATFORM_ICONS = {
+    "twitter": "🐦",
+    "instagram": "📸",
+    "linkedin": "💼",
+    "youtube": "▶️",
+    "blog": "✍️"
+}
+
+@st.cache_resource
+def get_session():
+    """
+    One pooled HTTP session per Streamlit process, so reruns reuse connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=IMAGE_PREFETCH_WORKERS * 2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class ResponseCache:
+    """
+    TTL cache shared by every session in this process. Expired entries are
+    dropped on write, then the least recently used until it fits its bounds.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(value):
+        if isinstance(value, tuple) and value and isinstance(value[0], bytes):
+            return len(value[0])
+        return len(json.dumps(value, default=str))
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time() + ttl, size, value)
+            self.size += size
+            now = time.time()
+            for expired in [k for k, entry in self._entries.items() if entry[0] < now]:
+                self._drop(expired)
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+
+def cache_get(key):
+    return get_response_cache().get(key)
+
+def cache_set(key, value, ttl):
+    get_response_cache().set(key, value, ttl)
+
+def fetch_image(url):
+    response = get_session().get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.content, response.headers.get("content-type", "image/jpeg")
+
+def prefetch_images(urls):
+    """
+    Downloads every image not already cached, concurrently. Returns
+    {url: (bytes, content_type)}; images that failed are left out.
+    """
+    missing = list(dict.fromkeys(u for u in urls if cache_get(("image", u)) is None))
+    if missing:
+        with ThreadPoolExecutor(max_workers=IMAGE_PREFETCH_WORKERS) as pool:
+            futures = {url: pool.submit(fetch_image, url) for url in missing}
+        for url, future in futures.items():
+            try:
+                cache_set(("image", url), future.result(), IMAGE_CACHE_TTL)
+            except Exception as e:
+                print(f"Could not fetch image {url}: {e}")
+    return {url: cache_get(("image", url)) for url in urls if cache_get(("image", url)) is not None}
+
+def stream_generation(payload):
+    """
+    Yields (event, data) pairs from the backend's server-sent events stream.
+    """
+    with get_session().post(STREAM_URL, params={"tokens": "true"}, json=payload, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):].strip())
+
+def render_live_draft(slot, platform, draft, tags, schedule):
+    with slot.container():
+        st.markdown(f"**{PLATFORM_ICONS.get(platform, '📱')} {platform.capitalize()} Draft**")
+        st.markdown(draft or "_Writing..._")
+        if tags:
+            st.info(f"**Hashtags:** {' '.join(tags)}")
+        if schedule:
+            st.warning(f"📅 **Best Posting Time:** {schedule}")
+
 # --- Sidebar Navigation ---
 st.sidebar.title("🧭 Navigation")
 page = st.sidebar.radio("Go to", ["Content Generator", "Visuals Gallery"])
@@ -62,6 +201,8 @@ if page == "Content Generator":
         ["Professional", "Casual", "Humorous", "Inspirational", "Educational", "Sales-oriented"],
         index=0
     )
+    
+    fused = st.sidebar.checkbox("⚡ Fast mode (one AI call for all platforms)", value=False)
 
     if st.button("✨ Generate Content", type="primary"):
         if not base_content:
@@ -72,11 +213,50 @@ if page == "Content Generator":
                     payload = {
                         "base_content": base_content,
                         "platforms": platforms,
-                        "tone": tone
+                        "tone": tone,
+                        "generation_mode": "fused" if fused else "per_platform"
                     }
-                    response = requests.post(API_URL, json=payload)
-                    response.raise_for_status()
-                    data = response.json()
+                    
+                    # Same request within the TTL: show the earlier result without calling the backend
+                    cache_key = ("generate", json.dumps(payload, sort_keys=True))
+                    data = cache_get(cache_key)
+                    if data is None:
+                        # Render drafts as each agent finishes instead of waiting for the whole run
+                        live = st.empty()
+                        with live.container():
+                            status = st.empty()
+                            live_tabs = st.tabs([f"{PLATFORM_ICONS.get(p, '📱')} {p.capitalize()}" for p in platforms])
+                            slots = {p: tab.empty() for p, tab in zip(platforms, live_tabs)}
+                    
+                        drafts, tags, times = {}, {}, {}
+                        data = None
+                        for event, body in stream_generation(payload):
+                            if event == "token":
+                                if body.get("stage") == "polish":
+                                    # The polished post arrives with the node update
+                                    continue
+                                platform = body["node"].replace("_adapter", "")
+                                drafts[platform] = drafts.get(platform, "") + body["delta"]
+                            elif event == "node":
+                                status.info(f"✅ {body['node'].replace('_', ' ').title()} finished")
+                                update = body["update"]
+                                drafts.update(update.get("platform_outputs", {}))
+                                tags.update(update.get("hashtags", {}))
+                                times.update(update.get("schedules", {}))
+                            elif event == "done":
+                                data = body
+                                break
+                            elif event == "error":
+                                raise requests.exceptions.RequestException(body.get("detail", "Generation failed"))
+                        
+                            for platform, slot in slots.items():
+                                render_live_draft(slot, platform, drafts.get(platform), tags.get(platform), times.get(platform))
+                    
+                        live.empty()
+                        if data is None:
+                            raise requests.exceptions.RequestException("Stream ended before generation finished")
+                    
+                        cache_set(cache_key, data, GENERATION_CACHE_TTL)
                     
                     # Store results in session state
                     st.session_state.results = data
@@ -90,15 +270,6 @@ if page == "Content Generator":
         data = st.session_state.results
         st.markdown("---")
         
-        # Platform Icons
-        PLATFORM_ICONS = {
-            "twitter": "🐦",
-            "instagram": "📸",
-            "linkedin": "💼",
-            "youtube": "▶️",
-            "blog": "✍️"
-        }
-        
         # Create tabs for platforms
         if "platform_outputs" in data:
             platform_tabs = st.tabs([f"{PLATFORM_ICONS.get(p, '📱')} {p.capitalize()}" for p in data["platform_outputs"].keys()])
@@ -115,8 +286,8 @@ if page == "Content Generator":
                         
                     # Schedule
                     if "schedules" in data and platform in data["schedules"]:
-                        time = data["schedules"][platform]
-                        st.warning(f"📅 **Best Posting Time:** {time}")
+                        schedule = data["schedules"][platform]
+                        st.warning(f"📅 **Best Posting Time:** {schedule}")
                         
                     st.download_button(
                         label="⬇️ Download JSON",
@@ -145,10 +316,11 @@ elif page == "Visuals Gallery":
                             "topic": metadata.get("topic", ""),
                             "keywords": metadata.get("keywords", [])
                         }
-                        response = requests.post("http://localhost:8000/regenerate_visuals", json=payload)
+                        response = get_session().post(f"{BACKEND_URL}/regenerate_visuals", json=payload, timeout=REQUEST_TIMEOUT)
                         if response.status_code == 200:
-                            new_visuals = response.json().get("visuals", [])
-                            st.session_state.results["visuals"] = new_visuals
+                            refreshed = response.json()
+                            st.session_state.results["visuals"] = refreshed.get("visuals", [])
+                            st.session_state.results["visual_ids"] = refreshed.get("visual_ids", [])
                             st.success("Visuals refreshed!")
                             st.rerun()
                         else:
@@ -159,38 +331,38 @@ elif page == "Visuals Gallery":
                 st.warning("No metadata available to refresh visuals.")
 
         visuals = st.session_state.results.get("visuals", [])
+        visual_ids = st.session_state.results.get("visual_ids", [])
+        if len(visual_ids) != len(visuals):
+            # Older results without proxy ids load straight from the source
+            visual_ids = [None] * len(visuals)
         
         if visuals:
+            # Backend cache ids when available: thumbnails for the grid, originals for downloads
+            thumb_urls = [f"{IMAGE_URL}/{i}?size=thumb" if i else u for u, i in zip(visuals, visual_ids)]
+            full_urls = [f"{IMAGE_URL}/{i}" if i else u for u, i in zip(visuals, visual_ids)]
+            with st.spinner("Loading images..."):
+                images = prefetch_images(thumb_urls + full_urls)
+            
             # Create rows of 2 images each
             for i in range(0, len(visuals), 2):
                 cols = st.columns(2)
-                # Get the slice of 2 images for this row
-                row_visuals = visuals[i:i+2]
                 
-                for j, img_url in enumerate(row_visuals):
-                    idx = i + j
-                    with cols[j]:
-                        st.image(img_url, use_container_width=True)
+                for idx in range(i, min(i + 2, len(visuals))):
+                    with cols[idx - i]:
+                        thumb = images.get(thumb_urls[idx])
+                        st.image(thumb[0] if thumb else visuals[idx], use_container_width=True)
                         
-                        # Download Button Logic
-                        try:
-                            # We need to fetch the image to download it
-                            # Use a unique key for each button to avoid conflicts
-                            if st.button(f"⬇️ Download Image {idx+1}", key=f"btn_dl_{idx}"):
-                                with st.spinner("Downloading..."):
-                                    r = requests.get(img_url)
-                                    if r.status_code == 200:
-                                        st.download_button(
-                                            label="⬇️ Click to Save",
-                                            data=r.content,
-                                            file_name=f"visual_{idx+1}.jpg",
-                                            mime="image/jpeg",
-                                            key=f"dl_final_{idx}"
-                                        )
-                                    else:
-                                        st.error("Could not fetch image.")
-                        except Exception as e:
-                            st.error(f"Error: {e}")
+                        full = images.get(full_urls[idx])
+                        if full:
+                            st.download_button(
+                                label=f"⬇️ Download Image {idx+1}",
+                                data=full[0],
+                                file_name=f"visual_{idx+1}.jpg",
+                                mime=full[1],
+                                key=f"dl_{idx}"
+                            )
+                        else:
+                            st.error("Could not fetch image.")
         else:
             st.info("No visuals found. Try generating content first or check your Serper API key.")
     else:
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+# Offline stand-ins for Groq, Tavily and Serper, and throwaway stores. Set
+# before any backend module reads its configuration.
+_cache_dir = tempfile.mkdtemp(prefix="viralflow-tests-")
+for name, value in {
+    "LLM_PROVIDER": "stub",
+    "SEARCH_PROVIDER": "stub",
+    "LLM_CACHE_ENABLED": "false",
+    "VISUALS_PREFETCH_TIMEOUT_SECONDS": "0",
+    "GRAPH_WARMUP": "off",
+    "IMAGE_CACHE_DIR": os.path.join(_cache_dir, "images"),
+    "RUN_STORE_PATH": os.path.join(_cache_dir, "runs.sqlite"),
+    "JOB_STORE_PATH": os.path.join(_cache_dir, "jobs.sqlite"),
+    "CHECKPOINT_PATH": os.path.join(_cache_dir, "checkpoints.sqlite"),
+}.items():
+    os.environ.setdefault(name, value)
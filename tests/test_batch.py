@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from backend.app.graph import batch
+from backend.app.models.schemas import ContentRequest
+from backend.app.utils.deadlines import stage_timeout
+from backend.main import build_initial_state, get_graph
+
+def states(*platform_lists):
+    return [
+        build_initial_state(ContentRequest(base_content="AI tools for writers", platforms=platforms, tone="casual"))
+        for platforms in platform_lists
+    ]
+
+def test_items_on_one_topic_share_research_but_keep_their_platforms(monkeypatch):
+    calls = []
+    research = batch.hashtag_research_agent
+
+    async def counting_hashtags(state):
+        calls.append(sorted(state["platforms"]))
+        return await research(state)
+
+    monkeypatch.setattr(batch, "hashtag_research_agent", counting_hashtags)
+
+    results = asyncio.run(batch.run_batch(get_graph(), states(["Twitter"], ["linkedin", "blog"])))
+
+    # Stub metadata is the same for both items, so they form one group
+    assert calls == [["blog", "linkedin", "twitter"]]
+    for result, platforms in zip(results, (["twitter"], ["linkedin", "blog"])):
+        assert sorted(result["platform_outputs"]) == sorted(platforms)
+        assert sorted(result["hashtags"]) == sorted(platforms)
+        assert sorted(result["schedules"]) == sorted(platforms)
+
+class DeadlineGraph:
+    """
+    Records the optimizer's time left as each item's graph run starts.
+    """
+
+    def __init__(self):
+        self.timeouts = {}
+
+    async def ainvoke(self, state):
+        self.timeouts[state["base_content"]] = stage_timeout("content_optimizer")
+        return state
+
+def test_each_item_runs_under_its_own_budget():
+    graph = DeadlineGraph()
+    initial_states = [
+        {**state, "base_content": name}
+        for state, name in zip(states(["twitter"], ["twitter"], ["twitter"]), ("short", "unlimited", "long"))
+    ]
+
+    asyncio.run(batch.run_batch(graph, initial_states, [5, 0, 60]))
+
+    assert graph.timeouts["short"] == pytest.approx(5, abs=1)
+    assert graph.timeouts["unlimited"] is None
+    assert graph.timeouts["long"] == pytest.approx(60, abs=1)
@@ -0,0 +1,57 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+from langgraph.graph import StateGraph, START, END
+from backend.app.graph.checkpoints import Checkpoints
+
+class State(TypedDict):
+    steps: Annotated[list, operator.add]
+
+def build_graph(calls):
+    def first(state):
+        return {"steps": ["first"]}
+
+    def second(state):
+        calls.append("second")
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return {"steps": ["second"]}
+
+    builder = StateGraph(State)
+    builder.add_node("first", first)
+    builder.add_node("second", second)
+    builder.add_edge(START, "first")
+    builder.add_edge("first", "second")
+    builder.add_edge("second", END)
+    return builder.compile()
+
+async def run(checkpoints, graph):
+    nodes, final = {}, None
+    async for mode, chunk in checkpoints.astream(graph, "t", {"steps": []}, ["updates", "values"]):
+        if mode == "values":
+            final = chunk
+        else:
+            nodes.update(chunk)
+    return nodes, final
+
+def test_resumed_and_replayed_runs_report_every_node(tmp_path):
+    async def scenario():
+        checkpoints = Checkpoints(path=str(tmp_path / "cp.sqlite"))
+        assert checkpoints.saver is None
+        graph = build_graph(calls := [])
+        try:
+            try:
+                await run(checkpoints, graph)
+            except RuntimeError:
+                pass
+            resumed = await run(checkpoints, graph)
+            replayed = await run(checkpoints, graph)
+        finally:
+            await checkpoints.stop()
+        return calls, resumed, replayed
+
+    calls, resumed, replayed = asyncio.run(scenario())
+    assert calls == ["second", "second"]
+    for nodes, final in (resumed, replayed):
+        assert nodes == {"first": {"steps": ["first"]}, "second": {"steps": ["second"]}}
+        assert final == {"steps": ["first", "second"]}
@@ -0,0 +1,43 @@
+import asyncio
+import httpx
+import backend.main as main
+
+BODY = {"base_content": "AI tools for writers", "platforms": ["twitter"], "tone": "casual"}
+
+def post_concurrently(monkeypatch, headers):
+    """
+    Sends one /generate per entry in `headers` at once and returns the run ids
+    and the checkpoint thread of every graph run that was started.
+    """
+    threads = []
+
+    async def slow_run_graph(initial_state, on_update=None, thread=None):
+        threads.append(thread)
+        await asyncio.sleep(0.1)
+        return initial_state, {}
+
+    monkeypatch.setattr(main, "run_graph", slow_run_graph)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*[client.post("/generate", json=BODY, headers=h) for h in headers])
+        return [r.json()["run_id"] for r in responses]
+
+    return asyncio.run(scenario()), threads
+
+def test_identical_requests_in_flight_share_one_run(monkeypatch):
+    run_ids, threads = post_concurrently(monkeypatch, [{}, {}, {}])
+    assert threads == [None]
+    assert len(set(run_ids)) == 1
+
+def test_keyed_requests_do_not_join_other_runs(monkeypatch):
+    run_ids, threads = post_concurrently(monkeypatch, [{}, {"Idempotency-Key": "a"}, {"Idempotency-Key": "b"}])
+    assert sorted(t.split(":")[0] for t in threads if t) == ["a", "b"]
+    assert None in threads
+    assert len(set(run_ids)) == 3
+
+def test_retries_with_the_same_key_share_one_run(monkeypatch):
+    run_ids, threads = post_concurrently(monkeypatch, [{"Idempotency-Key": "a"}, {"Idempotency-Key": "a"}])
+    assert len(threads) == 1 and threads[0].startswith("a:")
+    assert len(set(run_ids)) == 1
@@ -0,0 +1,23 @@
+import asyncio
+import time
+import pytest
+from backend.app.utils.deadlines import request_deadline, stage_timeout, within_deadline
+
+def test_no_budget_means_no_timeout():
+    with request_deadline(0):
+        assert stage_timeout("content_optimizer") is None
+        assert asyncio.run(within_deadline("content_optimizer", asyncio.sleep(0.01, "done"))) == "done"
+
+def test_stage_past_its_share_times_out():
+    async def scenario():
+        with request_deadline(0.2):
+            # content_understanding gets the first 25% of the budget
+            await within_deadline("content_understanding", asyncio.sleep(1))
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenario())
+
+def test_blocks_can_share_one_clock():
+    start = time.monotonic() - 1
+    with request_deadline(2, start):
+        assert stage_timeout("content_optimizer") == pytest.approx(1, abs=0.05)
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from backend.app.agents import platform_adapters
+from backend.app.utils import stubs
+
+PLATFORMS = ["twitter", "linkedin", "blog", "instagram"]
+
+def run_fused(monkeypatch, fused_payload):
+    """
+    Runs the fused adapter against a stub whose fused_drafts answer is
+    `fused_payload`. Returns the drafts handed to the optimizer and the
+    platforms that fell back to their own adapter call.
+    """
+    responses = {**stubs.DEFAULT_RESPONSES, "fused_drafts": fused_payload}
+    monkeypatch.setattr(stubs, "_load_responses", lambda: responses)
+
+    fallbacks, polished = [], {}
+    adapter = platform_adapters.platform_adapter_agent
+
+    async def counting_adapter(state, platform):
+        fallbacks.append(platform)
+        return await adapter(state, platform)
+
+    async def capture_optimizer(state):
+        polished.update(state["platform_outputs"])
+        return {"platform_outputs": state["platform_outputs"]}
+
+    monkeypatch.setattr(platform_adapters, "platform_adapter_agent", counting_adapter)
+    monkeypatch.setattr(platform_adapters, "content_optimizer_agent", capture_optimizer)
+
+    state = {"base_content": "AI tools for writers", "platforms": PLATFORMS, "metadata": {"topic": "ai", "keywords": []}}
+    asyncio.run(platform_adapters.fused_adapter_agent(state))
+    return polished, sorted(fallbacks)
+
+def test_missing_and_invalid_entries_fall_back_per_platform(monkeypatch):
+    polished, fallbacks = run_fused(monkeypatch, {"twitter": "fused tweet", "linkedin": "  ", "blog": 42})
+
+    assert fallbacks == ["blog", "instagram", "linkedin"]
+    assert polished["twitter"] == "fused tweet"
+    assert sorted(polished) == sorted(PLATFORMS)
+
+@pytest.mark.parametrize("payload", [["not", "an", "object"], "not json at all"])
+def test_malformed_payload_falls_back_for_every_platform(monkeypatch, payload):
+    polished, fallbacks = run_fused(monkeypatch, payload)
+
+    assert fallbacks == sorted(PLATFORMS)
+    assert sorted(polished) == sorted(PLATFORMS)
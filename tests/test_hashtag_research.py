@@ -0,0 +1,26 @@
+import asyncio
+import backend.app.agents.hashtag_research as hashtag_research
+
+STATE = {"metadata": {"topic": "ai", "keywords": ["ml"]}, "platforms": ["twitter"]}
+
+def test_opted_out_research_is_shared_in_flight_only(monkeypatch):
+    calls = []
+
+    async def research(topic, keywords, platforms):
+        calls.append(topic)
+        await asyncio.sleep(0.01)
+        return {"hashtags": {"twitter": ["#ai"]}}
+
+    monkeypatch.setattr(hashtag_research, "_research_hashtags", research)
+    monkeypatch.setattr(hashtag_research, "HASHTAG_CACHE_ENABLED", False)
+
+    async def scenario():
+        # Concurrent callers share one run...
+        first = await asyncio.gather(*[hashtag_research.hashtag_research_agent(STATE) for _ in range(3)])
+        # ...but a later one calls the model again
+        second = await hashtag_research.hashtag_research_agent(STATE)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result == {"hashtags": {"twitter": ["#ai"]}} for result in [*first, second])
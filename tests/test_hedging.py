@@ -0,0 +1,38 @@
+import asyncio
+from backend.app.utils.hedging import HedgedChain, LLM_HEDGE_MIN_SAMPLES
+
+class SlowThenFast:
+    """
+    Chain whose first call hangs and whose later calls answer right away.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def ainvoke(self, inputs, config=None):
+        self.calls += 1
+        if self.calls == 1:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return inputs
+
+def test_slow_call_is_hedged_and_loser_cancelled(monkeypatch):
+    monkeypatch.setattr("backend.app.utils.hedging.LLM_HEDGE_MIN_DELAY_SECONDS", 0.01)
+    chain = SlowThenFast()
+    hedged = HedgedChain(chain, "test")
+    for _ in range(LLM_HEDGE_MIN_SAMPLES):
+        hedged.latencies.record(0.01)
+
+    assert asyncio.run(asyncio.wait_for(hedged.ainvoke("answer"), 1)) == "answer"
+    assert chain.calls == 2
+    assert chain.cancelled == 1
+
+def test_no_hedging_before_enough_samples():
+    chain = SlowThenFast()
+    chain.calls = 1
+    assert asyncio.run(HedgedChain(chain, "test").ainvoke("answer")) == "answer"
+    assert chain.calls == 2
@@ -0,0 +1,49 @@
+import asyncio
+from io import BytesIO
+import httpx
+import pytest
+from PIL import Image
+from backend.app.utils import images
+from backend.app.utils.images import ImageStore
+
+def _png():
+    out = BytesIO()
+    Image.new("RGB", (8, 8), "red").save(out, "PNG")
+    return out.getvalue()
+
+def _store(tmp_path, handler):
+    store = ImageStore(str(tmp_path))
+    store._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    store._semaphore = asyncio.Semaphore(1)
+    return store
+
+def test_download_is_cached_and_deduplicated(tmp_path):
+    data = _png()
+    store = _store(tmp_path, lambda request: httpx.Response(200, headers={"content-type": "image/png"}, content=data))
+
+    async def scenario():
+        first = await store.fetch(store.register("https://a.example/1.png"))
+        second = await store.fetch(store.register("https://b.example/2.png"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert store.read(first[0]) == data
+
+def test_oversized_body_is_rejected_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "IMAGE_MAX_BYTES", 1024)
+
+    async def body():
+        # Chunked, so there is no Content-Length to check up front
+        for _ in range(100):
+            yield b"x" * 512
+
+    store = _store(tmp_path, lambda request: httpx.Response(200, headers={"content-type": "image/png"}, content=body()))
+    with pytest.raises(ValueError, match="too large"):
+        asyncio.run(store.fetch(store.register("https://a.example/huge.png")))
+
+def test_oversized_content_length_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "IMAGE_MAX_BYTES", 1024)
+    store = _store(tmp_path, lambda request: httpx.Response(200, headers={"content-type": "image/png"}, content=b"x" * 4096))
+    with pytest.raises(ValueError, match="4096 bytes"):
+        asyncio.run(store.fetch(store.register("https://a.example/big.png")))
@@ -0,0 +1,52 @@
+import sqlite3
+import time
+from backend.app.utils.job_store import SQLiteJobStore, QUEUED, RUNNING, SUCCEEDED
+
+def test_only_one_owner_claims_a_queued_job(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    job = store.create({"base_content": "ai"})
+    assert store.claim(job["id"], "a", 60)
+    assert not store.claim(job["id"], "b", 60)
+    assert store.get(job["id"])["owner"] == "a"
+
+def test_recover_skips_live_leases_and_requeues_expired_ones(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    live, expired = store.create({}), store.create({})
+    store.claim(live["id"], "a", 60)
+    store.claim(expired["id"], "b", -1)
+
+    assert store.recover() == [expired["id"]]
+    assert store.get(live["id"])["status"] == RUNNING
+    assert store.get(expired["id"])["status"] == QUEUED
+    # A second process finds nothing left to take back
+    assert SQLiteJobStore(str(tmp_path / "jobs.sqlite")).recover() == []
+
+def test_renewal_and_updates_need_the_current_owner(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    job = store.create({})
+    store.claim(job["id"], "a", -1)
+    store.recover()
+    store.claim(job["id"], "b", 60)
+
+    assert not store.renew(job["id"], "a", 60)
+    assert not store.update(job["id"], only_if=(RUNNING,), owner="a", status=SUCCEEDED)
+    assert store.renew(job["id"], "b", 60)
+    assert store.update(job["id"], only_if=(RUNNING,), owner="b", status=SUCCEEDED)
+
+def test_running_jobs_from_stores_without_leases_are_recovered(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL,
+        partial TEXT, result TEXT, error TEXT, version INTEGER NOT NULL,
+        created_at REAL NOT NULL, updated_at REAL NOT NULL)
+        """
+    )
+    conn.execute("INSERT INTO jobs VALUES ('old', ?, '{}', NULL, NULL, NULL, 3, ?, ?)", (RUNNING, time.time(), time.time()))
+    conn.commit()
+    conn.close()
+
+    store = SQLiteJobStore(path)
+    assert store.recover() == ["old"]
+    assert store.queued() == ["old"]
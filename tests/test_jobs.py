@@ -0,0 +1,111 @@
+import asyncio
+from backend.app.graph.jobs import JobManager
+from backend.app.utils.job_store import SQLiteJobStore, RUNNING, SUCCEEDED, CANCELLED
+from backend.main import run_job
+
+REQUEST = {"base_content": "AI tools for writers", "platforms": ["twitter", "linkedin"], "tone": "casual"}
+
+async def wait_until_finished(manager, job_id, timeout=10):
+    job = manager.get(job_id)
+    while job["status"] not in (SUCCEEDED, CANCELLED, "failed"):
+        job = await manager.wait(job_id, job["version"], timeout)
+    return job
+
+def test_submitted_job_runs_to_completion(tmp_path):
+    async def scenario():
+        manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite")), run_job, workers=1)
+        manager.start()
+        try:
+            job = manager.submit(REQUEST)
+            return await wait_until_finished(manager, job["id"])
+        finally:
+            await manager.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == SUCCEEDED
+    assert sorted(job["result"]["platform_outputs"]) == ["linkedin", "twitter"]
+    assert job["result"]["run_id"]
+
+def test_long_poll_wakes_up_when_the_job_changes(tmp_path):
+    async def scenario():
+        started = asyncio.Event()
+
+        async def execute(job_id, request, report):
+            started.set()
+            await asyncio.sleep(0.05)
+            report({"step": 1})
+            return {"done": True}
+
+        manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite")), execute, workers=1)
+        manager.start()
+        try:
+            job = manager.submit(REQUEST)
+            await started.wait()
+            running = manager.get(job["id"])
+            loop = asyncio.get_running_loop()
+            begin = loop.time()
+            changed = await manager.wait(job["id"], running["version"], timeout=5)
+            return running, changed, loop.time() - begin
+        finally:
+            await manager.stop()
+
+    running, changed, elapsed = asyncio.run(scenario())
+    assert running["status"] == RUNNING
+    assert changed["version"] > running["version"]
+    assert changed["partial"] == {"step": 1}
+    assert elapsed < 1
+
+def test_cancel_stops_a_running_job(tmp_path):
+    async def scenario():
+        started, stopped = asyncio.Event(), asyncio.Event()
+
+        async def execute(job_id, request, report):
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        manager = JobManager(SQLiteJobStore(str(tmp_path / "jobs.sqlite")), execute, workers=1)
+        manager.start()
+        try:
+            job = manager.submit(REQUEST)
+            await started.wait()
+            cancelled = manager.cancel(job["id"])
+            await asyncio.wait_for(stopped.wait(), 1)
+            return cancelled, manager.get(job["id"])
+        finally:
+            await manager.stop()
+
+    cancelled, job = asyncio.run(scenario())
+    assert cancelled["status"] == CANCELLED
+    assert job["status"] == CANCELLED
+
+def test_restart_recovers_jobs_whose_lease_expired(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = SQLiteJobStore(path)
+    abandoned, live = store.create(REQUEST), store.create(REQUEST)
+    # One worker died mid-run; another is still running its job
+    store.claim(abandoned["id"], "dead", -1)
+    store.claim(live["id"], "alive", 60)
+
+    async def scenario():
+        executed = []
+
+        async def execute(job_id, request, report):
+            executed.append(job_id)
+            return {"done": True}
+
+        manager = JobManager(SQLiteJobStore(path), execute, workers=1)
+        manager.start()
+        try:
+            job = await wait_until_finished(manager, abandoned["id"])
+        finally:
+            await manager.stop()
+        return executed, job
+
+    executed, job = asyncio.run(scenario())
+    assert executed == [abandoned["id"]]
+    assert job["status"] == SUCCEEDED
+    assert store.get(live["id"])["status"] == RUNNING
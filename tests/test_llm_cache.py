@@ -0,0 +1,69 @@
+import asyncio
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.outputs import Generation
+from backend.app.utils import cache as cache_module
+from backend.app.utils.cache import SQLiteLLMCache
+from backend.app.utils.llm import get_llm
+from backend.app.utils.stubs import StubChatModel
+
+class Clock:
+    """
+    Stands in for the cache module's `time`, advanced by hand.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"), ttl_seconds=10)
+    cache.update("prompt", "model", [Generation(text="answer")])
+
+    clock.now += 5
+    assert cache.lookup("prompt", "model")[0].text == "answer"
+    clock.now += 10
+    assert cache.lookup("prompt", "model") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    for prompt in ("a", "b"):
+        clock.now += 1
+        cache.update(prompt, "model", [Generation(text=prompt)])
+    clock.now += 1
+    # Reading "a" makes "b" the least recently used
+    cache.lookup("a", "model")
+    clock.now += 1
+    cache.update("c", "model", [Generation(text="c")])
+
+    assert cache.lookup("b", "model") is None
+    assert cache.lookup("a", "model") and cache.lookup("c", "model")
+    assert cache.stats()["evictions"] == 1
+
+def test_opted_out_nodes_bypass_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.app.utils.llm.LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr("backend.app.utils.llm.LLM_CACHE_OPT_OUT", {"visuals_search"})
+    assert get_llm("visuals_search").cache is False
+    assert get_llm("hashtag_research").cache is None
+
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"))
+    previous = get_llm_cache()
+    set_llm_cache(cache)
+    try:
+        for model in (StubChatModel(agent="visuals_search", cache=False), StubChatModel(agent="hashtag_research")):
+            for _ in range(2):
+                asyncio.run(model.ainvoke("prompt"))
+    finally:
+        set_llm_cache(previous)
+
+    # Only the cached model looked anything up: one miss, then one hit
+    assert (cache.hits, cache.misses, cache.stats()["entries"]) == (1, 1, 1)
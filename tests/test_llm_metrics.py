@@ -0,0 +1,25 @@
+import uuid
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from backend.app.utils.llm import MetricsCallbackHandler
+from backend.app.utils.metrics import LLM_TOKENS
+
+def record_call(tags):
+    handler = MetricsCallbackHandler()
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start(
+        {}, [], run_id=run_id, tags=tags,
+        metadata={"langgraph_node": "twitter_adapter", "ls_model_name": "test-model"}
+    )
+    message = AIMessage("ok", usage_metadata={"input_tokens": 3, "output_tokens": 2, "total_tokens": 5})
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+def completion_tokens(node):
+    return LLM_TOKENS.labels(node=node, kind="completion")._value.get()
+
+def test_polish_calls_are_labelled_apart_from_drafts():
+    drafts, polish = completion_tokens("twitter_adapter"), completion_tokens("content_optimizer")
+    record_call([])
+    record_call(["polish"])
+    assert completion_tokens("twitter_adapter") == drafts + 2
+    assert completion_tokens("content_optimizer") == polish + 2
@@ -0,0 +1,46 @@
+import asyncio
+from backend.app.utils.rate_limit import OutboundLimiter
+
+async def _hang():
+    await asyncio.Event().wait()
+
+async def _ok():
+    return "ok"
+
+def test_cancelled_calls_release_their_slot():
+    async def scenario():
+        limiter = OutboundLimiter("test", max_concurrency=2)
+        calls = [asyncio.ensure_future(limiter.call(_hang)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert limiter.window.in_flight == 2
+
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+
+        assert limiter.window.in_flight == 0
+        assert await asyncio.wait_for(limiter.call(_ok), 1) == "ok"
+
+    asyncio.run(scenario())
+
+def test_cancelled_streams_release_their_slot():
+    async def endless():
+        while True:
+            yield "chunk"
+            await asyncio.Event().wait()
+
+    async def consume(limiter):
+        async for _ in limiter.stream(endless):
+            pass
+
+    async def scenario():
+        limiter = OutboundLimiter("test", max_concurrency=1)
+        task = asyncio.ensure_future(consume(limiter))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert limiter.window.in_flight == 0
+        assert await asyncio.wait_for(limiter.call(_ok), 1) == "ok"
+
+    asyncio.run(scenario())
@@ -0,0 +1,32 @@
+import asyncio
+from backend.app.graph.regenerate import plan_reuse
+
+PREVIOUS = {
+    "request": {"platforms": ["Twitter", "LinkedIn"], "tone": "casual"},
+    "nodes": {
+        "content_understanding": {"metadata": {"topic": "ai", "keywords": ["ai"], "tone": "casual"}},
+        "hashtag_research": {"hashtags": {"twitter": ["#ai"], "linkedin": ["#ml"]}},
+        "scheduling_advisor": {"schedules": {"twitter": "Mon", "linkedin": "Tue"}},
+        "visuals_search": {"visuals": [], "visual_ids": []},
+        "twitter_adapter": {"platform_outputs": {"twitter": "t"}},
+        "linkedin_adapter": {"platform_outputs": {"linkedin": "l"}},
+    },
+}
+
+def test_unchanged_regenerate_reuses_every_node():
+    state = {"platforms": ["twitter", "linkedin"], "tone": "casual"}
+    reuse = asyncio.run(plan_reuse(PREVIOUS, state))
+    assert set(reuse) == set(PREVIOUS["nodes"])
+    assert reuse["hashtag_research"]["hashtags"] == {"twitter": ["#ai"], "linkedin": ["#ml"]}
+
+def test_removed_platform_is_filtered_out():
+    state = {"platforms": ["twitter"], "tone": "casual"}
+    reuse = asyncio.run(plan_reuse(PREVIOUS, state))
+    assert reuse["scheduling_advisor"]["schedules"] == {"twitter": "Mon"}
+    assert "linkedin_adapter" not in reuse
+
+def test_tone_change_reruns_platform_pipelines():
+    state = {"platforms": ["twitter", "linkedin"], "tone": "formal"}
+    reuse = asyncio.run(plan_reuse(PREVIOUS, state))
+    assert reuse["content_understanding"]["metadata"]["tone"] == "formal"
+    assert "twitter_adapter" not in reuse and "linkedin_adapter" not in reuse
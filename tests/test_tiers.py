@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from backend.app.agents.chains import EscalatingChain
+from backend.app.utils import llm
+from backend.app.utils.hedging import LatencyWindow
+from backend.app.utils.metrics import LLM_ESCALATIONS
+from backend.app.utils.stubs import StubChatModel
+
+def stub_chain(agent, model):
+    # Unknown agents get the canned plain-text answer, which is not JSON
+    prompt = ChatPromptTemplate.from_template("{topic}")
+    return prompt | StubChatModel(agent=agent, model=model, cache=False) | JsonOutputParser()
+
+def test_unparseable_json_is_retried_on_the_larger_model():
+    chain = EscalatingChain(stub_chain("not_json", "small"), stub_chain("scheduling_advisor", "large"), "tier_test")
+    before = LLM_ESCALATIONS.labels(node="tier_test")._value.get()
+
+    result = asyncio.run(chain.ainvoke({"topic": "ai"}))
+
+    assert result["twitter"] == "Tuesday 10 AM"
+    assert LLM_ESCALATIONS.labels(node="tier_test")._value.get() == before + 1
+
+def test_parseable_json_stays_on_the_small_model():
+    chain = EscalatingChain(stub_chain("scheduling_advisor", "small"), stub_chain("not_json", "large"), "tier_test")
+    assert asyncio.run(chain.ainvoke({"topic": "ai"}))["twitter"] == "Tuesday 10 AM"
+
+@pytest.fixture
+def latencies(monkeypatch):
+    windows = {tier: LatencyWindow() for tier in llm.MODEL_TIERS}
+    monkeypatch.setattr(llm, "_tier_latencies", windows)
+    monkeypatch.setattr(llm, "LLM_TIER_MIN_SAMPLES", 5)
+    monkeypatch.setattr(llm, "LLM_TIER_SWITCH_RATIO", 1.5)
+    return windows
+
+def record(window, seconds, count):
+    for _ in range(count):
+        window.record(seconds)
+
+def test_route_needs_enough_samples_before_switching(latencies):
+    record(latencies["small"], 3.0, 5)
+    record(latencies["large"], 1.0, 4)
+    assert llm.route_tier("content_understanding") == "small"
+    latencies["large"].record(1.0)
+    assert llm.route_tier("content_understanding") == "large"
+
+def test_route_switches_only_past_the_ratio(latencies):
+    record(latencies["small"], 1.4, 5)
+    record(latencies["large"], 1.0, 5)
+    assert llm.route_tier("content_understanding") == "small"
+    record(latencies["small"], 1.6, 6)
+    assert llm.route_tier("content_understanding") == "large"
+
+def test_largest_tier_never_switches(latencies):
+    record(latencies["large"], 10.0, 5)
+    assert llm.route_tier("platform_adapter") == "large"
+
+def test_node_tiers_reject_unknown_tiers():
+    assert llm.parse_node_tiers(" hashtag_research=small , ") == {"hashtag_research": "small"}
+    with pytest.raises(ValueError, match="medium"):
+        llm.parse_node_tiers("hashtag_research=medium")
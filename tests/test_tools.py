@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from backend.app.utils import tools
+
+class FailingOnceWrapper:
+    """
+    Tavily API wrapper whose first search fails, like an HTTP error from the API.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def raw_results_async(self, query, max_results=5, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("Error 401: invalid API key")
+        return {"results": [{"url": "https://example.com", "content": "#AI"}]}
+
+    def clean_results(self, results):
+        return results
+
+class Search:
+    max_results = 5
+
+    def __init__(self):
+        self.api_wrapper = FailingOnceWrapper()
+
+def test_failed_trend_searches_are_not_cached(monkeypatch):
+    search = Search()
+    monkeypatch.setattr(tools, "get_tavily_search", lambda: search)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await tools.search_trending_hashtags("Trend cache test", ["b", "a"])
+        first = await tools.search_trending_hashtags("trend cache test", ["a", "b"])
+        second = await tools.search_trending_hashtags("TREND cache test", ["a", "b", "a"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == [{"url": "https://example.com", "content": "#AI"}]
+    # The failure was retried, and the equivalent search after it was served from the cache
+    assert search.api_wrapper.calls == 2